@@ -0,0 +1,308 @@
+"""Benchmarks of the RULA engine and the video pipeline
+
+Usage:
+    python benchmarks/run_benchmarks.py                      # micro and pipeline suites
+    python benchmarks/run_benchmarks.py --suite micro --sizes 1000 10000
+    python benchmarks/run_benchmarks.py --quick --compare benchmarks/results/OLD.json
+
+The micro suite times the per-frame RULACalculator API (calculate_rula_from_landmarks,
+the detect_* helpers, recalculate_rula) against its batch counterparts on synthetic
+landmark sets. The pipeline suite analyses and renders procedurally generated videos
+of several resolutions and lengths, each in a fresh process.
+
+Writes a JSON report with frames/sec and peak memory of every case, plus the commit
+and library versions, so runs can be compared across commits.
+"""
+import argparse
+import json
+import multiprocessing
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+REPO_DIR = BENCHMARK_DIR.parent
+sys.path.insert(0, str(REPO_DIR))
+
+import cv2
+import mediapipe as mp
+import numpy as np
+import pandas as pd
+
+from selarassehat_app import RESULT_COLUMNS, RULACalculator, analyze_video
+from synthetic import make_landmarks, make_video, to_landmark_lists
+
+MICRO_SIZES = [1_000, 10_000, 100_000]
+PIPELINE_RESOLUTIONS = [(640, 360), (1280, 720), (1920, 1080)]
+PIPELINE_LENGTHS = [150, 450]
+
+# The per-frame API cycles through this many distinct frames, so 100k frames don't need 100k landmark lists
+SCALAR_POOL_SIZE = 1_000
+
+DETECT_HELPERS = [
+    'detect_shoulder_raised', 'detect_arm_abducted', 'detect_working_across_midline', 'detect_wrist_deviation',
+    'detect_neck_twisted', 'detect_neck_side_bent', 'detect_trunk_twisted', 'detect_trunk_side_bent',
+]
+ANGLE_COLUMNS = RESULT_COLUMNS[1:6]
+FLAG_COLUMNS = RESULT_COLUMNS[8:]
+
+VIDEO_CACHE_DIR = Path(tempfile.gettempdir()) / 'selarassehat_benchmark_videos'
+
+
+def micro_cases(n_frames, seed=0):
+    """Name -> zero-argument callable processing `n_frames` synthetic frames"""
+    landmarks = make_landmarks(n_frames, seed)
+    pool = to_landmark_lists(landmarks[:SCALAR_POOL_SIZE])
+    frames = [pool[i % len(pool)] for i in range(n_frames)]
+    
+    # Angles and auto-detected flags to recalculate with manual adjustments (wrist twist, legs, muscle use, force)
+    scored = RULACalculator.calculate_rula_batch(landmarks)
+    angles = [scored[column] for column in ANGLE_COLUMNS]
+    flags = [scored[column] for column in FLAG_COLUMNS]
+    adjustments = (1, 1, 0, 0)
+    rows = list(zip(*(column.tolist() for column in angles + flags)))
+    
+    cases = {
+        'calculate_rula_from_landmarks': lambda: [
+            RULACalculator.calculate_rula_from_landmarks(frame) for frame in frames
+        ],
+        'calculate_rula_batch': lambda: RULACalculator.calculate_rula_batch(landmarks),
+        'calculate_rula_batch_worst_side': lambda: RULACalculator.calculate_rula_batch(landmarks, side='worst'),
+        'detect_adjustments_batch': lambda: RULACalculator.detect_adjustments_batch(landmarks),
+        'recalculate_rula': lambda: [RULACalculator.recalculate_rula(*row, *adjustments) for row in rows],
+        'recalculate_rula_batch': lambda: RULACalculator.recalculate_rula_batch(*angles, *flags, *adjustments),
+    }
+    for name in DETECT_HELPERS:
+        detect = getattr(RULACalculator, name)
+        cases[name] = lambda detect=detect: [detect(frame) for frame in frames]
+    return cases
+
+
+def time_case(case, repeat):
+    """Best wall-clock seconds of `repeat` runs, then peak traced memory (MB) of one more run"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        case()
+        best = min(best, time.perf_counter() - started)
+    
+    # Separate run: tracing slows down Python code
+    tracemalloc.start()
+    try:
+        case()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak / 2**20
+
+
+def run_micro(sizes, repeat):
+    results = []
+    for n_frames in sizes:
+        for name, case in micro_cases(n_frames).items():
+            seconds, peak_mb = time_case(case, repeat)
+            results.append({
+                'suite': 'micro',
+                'case': name,
+                'frames': n_frames,
+                'seconds': round(seconds, 6),
+                'fps': round(n_frames / seconds, 1),
+                'peak_mem_mb': round(peak_mb, 2),
+            })
+            print(f"micro {name:32s} {n_frames:>7d} frames {n_frames / seconds:>14,.0f} fps", file=sys.stderr)
+    return results
+
+
+def synthetic_video(width, height, n_frames):
+    """Path of the synthetic video for these parameters, generated on first use"""
+    VIDEO_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    path = VIDEO_CACHE_DIR / f"worker_{width}x{height}_{n_frames}.avi"
+    if not path.exists():
+        tmp_path = path.with_name(f"{path.stem}.tmp.avi")
+        make_video(tmp_path, width, height, n_frames)
+        tmp_path.replace(path)
+    return path
+
+
+def _peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == 'darwin' else peak / 2**10
+
+
+def _run_pipeline_case(video_path, options):
+    """Analyse and render one video; runs in a fresh process so peak RSS is its own"""
+    started = time.perf_counter()
+    analysis = analyze_video(str(video_path), use_cache=False, **options)
+    analysis_sec = time.perf_counter() - started
+    
+    output_path = analysis.render_video()
+    total_sec = time.perf_counter() - started
+    Path(output_path).unlink(missing_ok=True)
+    
+    timings = analysis.timings
+    return {
+        'analysis_sec': analysis_sec,
+        'render_sec': total_sec - analysis_sec,
+        'total_sec': total_sec,
+        'frames': analysis.frame_count,
+        'peak_rss_mb': _peak_rss_mb(),
+        'stages_sec': {
+            step: {stage: summary['total_sec'] for stage, summary in steps.items()}
+            for step, steps in timings.items()
+        },
+    }
+
+
+def run_pipeline(resolutions, lengths, options):
+    results = []
+    context = multiprocessing.get_context('spawn')  # MediaPipe is not safe to use across fork
+    for width, height in resolutions:
+        for n_frames in lengths:
+            video_path = synthetic_video(width, height, n_frames)
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                run = executor.submit(_run_pipeline_case, video_path, options).result()
+            
+            frames = run['frames']
+            results.append({
+                'suite': 'pipeline',
+                'case': f"{width}x{height}",
+                'frames': frames,
+                'seconds': round(run['total_sec'], 3),
+                'fps': round(frames / run['total_sec'], 2),
+                'analysis_fps': round(frames / run['analysis_sec'], 2),
+                'render_fps': round(frames / run['render_sec'], 2),
+                'peak_rss_mb': round(run['peak_rss_mb'], 1),
+                'options': options,
+                'stages_sec': run['stages_sec'],
+            })
+            print(
+                f"pipeline {width}x{height} {frames:>5d} frames: analysis {frames / run['analysis_sec']:.1f} fps, "
+                f"render {frames / run['render_sec']:.1f} fps, peak RSS {run['peak_rss_mb']:.0f} MB",
+                file=sys.stderr
+            )
+    return results
+
+
+def git_commit():
+    """(commit hash, working tree has changes), or (None, None) outside a git checkout"""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=REPO_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        status = subprocess.run(
+            ['git', 'status', '--porcelain', '--untracked-files=no'], cwd=REPO_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit, bool(status.strip())
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': multiprocessing.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'opencv': cv2.__version__,
+        'mediapipe': getattr(mp, '__version__', None),
+    }
+
+
+def compare(report, baseline):
+    """Print the fps ratio of every case present in both reports"""
+    previous = {(r['suite'], r['case'], r['frames']): r for r in baseline['results']}
+    print(f"Compared with {baseline.get('commit') or 'baseline'} ({baseline.get('created')}):", file=sys.stderr)
+    for result in report['results']:
+        old = previous.get((result['suite'], result['case'], result['frames']))
+        if old:
+            ratio = result['fps'] / old['fps']
+            print(
+                f"  {result['suite']:8s} {result['case']:32s} {result['frames']:>7d} frames "
+                f"{old['fps']:>14,.1f} -> {result['fps']:>14,.1f} fps ({ratio:.2f}x)",
+                file=sys.stderr
+            )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the RULA engine and the video pipeline.')
+    parser.add_argument('--suite', choices=['all', 'micro', 'pipeline'], default='all', help='which suite to run')
+    parser.add_argument('--quick', action='store_true', help='small sizes only, for a fast smoke run')
+    parser.add_argument('--sizes', type=int, nargs='+', help=f"micro suite frame counts (default: {MICRO_SIZES})")
+    parser.add_argument('--repeat', type=int, default=3, help='micro suite runs per case; the best is reported')
+    parser.add_argument('--lengths', type=int, nargs='+',
+                        help=f"pipeline video lengths in frames (default: {PIPELINE_LENGTHS})")
+    parser.add_argument('--resolutions', nargs='+', metavar='WxH',
+                        help='pipeline video sizes (default: ' +
+                             ' '.join(f"{w}x{h}" for w, h in PIPELINE_RESOLUTIONS) + ')')
+    parser.add_argument('--frame-stride', type=int, default=1, help='pipeline: run pose detection on every N-th frame')
+    parser.add_argument('--inference-width', type=int, default=None, help='pipeline: pose inference width')
+    parser.add_argument('--workers', type=int, default=1, help='pipeline: processes per video')
+    parser.add_argument('-o', '--output', help='report path (default: benchmarks/results/<commit>_<time>.json)')
+    parser.add_argument('--compare', help='earlier report to compare frames/sec with')
+    args = parser.parse_args(argv)
+    
+    if args.quick:
+        args.sizes = args.sizes or [1_000, 10_000]
+        args.lengths = args.lengths or [60]
+        args.resolutions = args.resolutions or ['640x360', '1280x720']
+        args.repeat = 1
+    args.sizes = args.sizes or MICRO_SIZES
+    args.lengths = args.lengths or PIPELINE_LENGTHS
+    try:
+        args.resolutions = [
+            tuple(int(v) for v in size.lower().split('x')) for size in args.resolutions
+        ] if args.resolutions else PIPELINE_RESOLUTIONS
+    except ValueError:
+        parser.error('--resolutions must look like 1280x720')
+    
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    commit, dirty = git_commit()
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'dirty': dirty,
+        'environment': environment(),
+        'results': [],
+    }
+    
+    if args.suite in ('all', 'micro'):
+        report['results'] += run_micro(args.sizes, args.repeat)
+    if args.suite in ('all', 'pipeline'):
+        options = {
+            'frame_stride': args.frame_stride,
+            'inference_width': args.inference_width,
+            'workers': args.workers,
+        }
+        report['results'] += run_pipeline(args.resolutions, args.lengths, options)
+    
+    if args.output:
+        output = Path(args.output)
+    else:
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        output = BENCHMARK_DIR / 'results' / f"{(commit or 'nogit')[:10]}_{stamp}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"Report written to {output}", file=sys.stderr)
+    
+    if args.compare:
+        compare(report, json.loads(Path(args.compare).read_text()))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""Procedurally generated inputs for the benchmarks: landmark sets and videos
+
+Nothing here needs network access or real footage. The videos show a simple
+cartoon worker moving one arm, which MediaPipe Pose detects in every frame.
+"""
+import cv2
+import numpy as np
+
+# Standing pose in normalized image coordinates (x, y, z), MediaPipe landmark order
+STANDING_POSE = np.array([
+    [0.50, 0.20, -0.30],  # 0 nose
+    [0.51, 0.18, -0.28], [0.52, 0.18, -0.28], [0.53, 0.18, -0.28],  # left eye inner/eye/outer
+    [0.49, 0.18, -0.28], [0.48, 0.18, -0.28], [0.47, 0.18, -0.28],  # right eye inner/eye/outer
+    [0.54, 0.19, -0.20], [0.46, 0.19, -0.20],  # ears
+    [0.51, 0.22, -0.27], [0.49, 0.22, -0.27],  # mouth
+    [0.58, 0.30, -0.10], [0.42, 0.30, -0.10],  # 11, 12 shoulders
+    [0.60, 0.42, -0.08], [0.40, 0.42, -0.08],  # 13, 14 elbows
+    [0.61, 0.53, -0.12], [0.39, 0.53, -0.12],  # 15, 16 wrists
+    [0.62, 0.56, -0.13], [0.38, 0.56, -0.13],  # pinkies
+    [0.61, 0.57, -0.14], [0.39, 0.57, -0.14],  # index fingers
+    [0.60, 0.56, -0.13], [0.40, 0.56, -0.13],  # thumbs
+    [0.55, 0.55, 0.00], [0.45, 0.55, 0.00],  # 23, 24 hips
+    [0.55, 0.72, 0.02], [0.45, 0.72, 0.02],  # knees
+    [0.55, 0.88, 0.05], [0.45, 0.88, 0.05],  # ankles
+    [0.56, 0.90, 0.06], [0.44, 0.90, 0.06],  # heels
+    [0.54, 0.92, -0.02], [0.46, 0.92, -0.02],  # foot index
+], dtype=np.float32)
+
+
+class SyntheticLandmark:
+    """Stand-in for a MediaPipe landmark, for the per-frame (scalar) API"""
+    
+    __slots__ = ('x', 'y', 'z', 'visibility')
+    
+    def __init__(self, x, y, z, visibility):
+        self.x = x
+        self.y = y
+        self.z = z
+        self.visibility = visibility
+
+
+def make_landmarks(n_frames, seed=0):
+    """(n_frames, 33, 4) float32 landmarks: the standing pose with random joint movement"""
+    rng = np.random.default_rng(seed)
+    landmarks = np.empty((n_frames, 33, 4), dtype=np.float32)
+    landmarks[:, :, :3] = STANDING_POSE + rng.normal(0, 0.05, (n_frames, 33, 3))
+    landmarks[:, :, 3] = rng.uniform(0.5, 1.0, (n_frames, 33))
+    return landmarks
+
+
+def to_landmark_lists(landmarks):
+    """Per-frame lists of SyntheticLandmark objects, as calculate_rula_from_landmarks expects"""
+    return [
+        [SyntheticLandmark(*map(float, point)) for point in frame]
+        for frame in landmarks
+    ]
+
+
+def draw_worker(image, t):
+    """Draw the cartoon worker for time step `t` onto `image` (BGR, in place)"""
+    h, w = image.shape[:2]
+    s = h / 480
+    cx, cy = w * 0.5, h * 0.25
+    
+    def p(x, y):
+        return int(cx + x * s), int(cy + y * s)
+    
+    skin = (140, 170, 220)
+    shirt = (120, 60, 30)
+    pants = (60, 60, 60)
+    
+    image[:] = (200, 210, 220)
+    cv2.ellipse(image, p(0, 0), (int(28 * s), int(36 * s)), 0, 0, 360, skin, -1)  # head
+    cv2.circle(image, p(-10, -5), int(4 * s), (30, 30, 30), -1)  # eyes
+    cv2.circle(image, p(10, -5), int(4 * s), (30, 30, 30), -1)
+    cv2.ellipse(image, p(0, 15), (int(10 * s), int(4 * s)), 0, 0, 180, (60, 60, 160), -1)  # mouth
+    cv2.rectangle(image, p(-45, 45), p(45, 190), shirt, -1)  # torso
+    
+    # Moving arm: the upper arm swings between about 0 and 70 degrees
+    angle = np.deg2rad(30 + 40 * np.sin(t / 10))
+    ex, ey = -60 - 70 * np.sin(angle), 55 + 70 * np.cos(angle)
+    cv2.line(image, p(-50, 55), p(ex, ey), shirt, int(22 * s))
+    cv2.line(image, p(ex, ey), p(ex - 10, ey + 70), skin, int(18 * s))
+    
+    # Resting arm and legs
+    cv2.line(image, p(50, 55), p(60, 130), shirt, int(22 * s))
+    cv2.line(image, p(60, 130), p(65, 200), skin, int(18 * s))
+    cv2.line(image, p(-25, 190), p(-30, 330), pants, int(30 * s))
+    cv2.line(image, p(25, 190), p(30, 330), pants, int(30 * s))
+
+
+def make_video(path, width, height, n_frames, fps=30):
+    """Write a synthetic MJPG video of the cartoon worker"""
+    out = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'MJPG'), fps, (width, height))
+    if not out.isOpened():
+        raise Exception(f"Could not create synthetic video {path}")
+    
+    image = np.zeros((height, width, 3), dtype=np.uint8)
+    try:
+        for t in range(n_frames):
+            draw_worker(image, t)
+            out.write(image)
+    finally:
+        out.release()
+    return path
@@ -1,10 +1,23 @@
 import streamlit as st
 import cv2
 import mediapipe as mp
+from mediapipe.framework.formats import landmark_pb2
 import numpy as np
 import pandas as pd
 import tempfile
 import os
+import sys
+import time
+import shutil
+import hashlib
+import json
+import queue
+import threading
+import collections
+import copy
+import multiprocessing
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, wait
 from pathlib import Path
 import plotly.graph_objects as go
 from datetime import datetime
@@ -25,6 +38,7 @@ TRANSLATIONS = {
         'upload_label': 'Upload Video',
         'upload_help': 'Upload a video (max 30 seconds recommended) showing work activity from side view',
         'processing': 'Processing video... Please wait',
+        'progress_text': '{frames_done}/{total_frames} frames, {fps:.1f} fps, pose detected {pose_rate:.0%}, {eta} remaining',
         'analysis_complete': 'Analysis Complete!',
         'results_title': 'RULA Assessment Results',
         'avg_score': 'Average RULA Score',
@@ -36,6 +50,29 @@ TRANSLATIONS = {
         'annotated_video': 'Annotated Video with Pose Detection',
         'download_csv': 'Download Detailed Results (CSV)',
         'download_video': 'Download Annotated Video',
+        'show_video': 'Show annotated video',
+        'prepare_video': 'Prepare Annotated Video',
+        'rendering_video': 'Rendering annotated video...',
+        'video_profile_label': 'Annotated Video Output',
+        'video_profile_help': 'Preview: half size and frame rate, small and quick to download, plays in the browser. Standard: full size, compressed. Full: original size and frame rate as MJPEG AVI (large files).',
+        'video_profiles': {'preview': 'Preview (small)', 'standard': 'Standard', 'full': 'Full quality (AVI)'},
+        'input_mode_label': 'Input',
+        'input_modes': {'upload': 'Upload recording', 'live': 'Live camera / stream'},
+        'live_source_label': 'Video source',
+        'live_source_help': 'Camera index (e.g. 0), stream URL (rtsp://, http://) or a video file path, replayed at its native frame rate',
+        'live_start': 'Start',
+        'live_stop': 'Stop',
+        'live_current_score': 'Current RULA Score',
+        'live_fps': 'Analysis FPS',
+        'live_latency': 'Latency (median)',
+        'live_dropped': 'Dropped Frames',
+        'live_session_avg': 'Session Average Score',
+        'exposure_title': 'Risk Exposure Time',
+        'risk_level_time': 'Risk Level {level}',
+        'longest_high_risk': 'Longest Continuous High Risk',
+        'timings_title': 'Processing Time Breakdown',
+        'timings_steps': {'analysis': 'Analysis', 'render': 'Video rendering'},
+        'download_timings': 'Download Timings (JSON)',
         'about_title': 'About SelarasSehat',
         'about_text': '''
         SelarasSehat is an automated ergonomic assessment tool that uses computer vision 
@@ -85,6 +122,24 @@ TRANSLATIONS = {
         'force_light': '2-10 kg intermittent',
         'force_heavy': '2-10 kg static/repeated, or >10 kg intermittent',
         'force_shock': 'Shock or rapid force increase',
+        'frame_stride_label': 'Analyze every N-th frame',
+        'frame_stride_help': 'Run pose detection on every N-th frame only and interpolate the frames in between. Higher values are faster for long recordings.',
+        'inference_width_label': 'Pose detection resolution',
+        'inference_width_help': 'Downscale frames to this width before pose detection. The annotated video keeps the original resolution.',
+        'inference_width_original': 'Original',
+        'workers_label': 'Parallel workers',
+        'workers_help': 'Split the video into segments analyzed by this many processes. Use more workers for long recordings on multi-core machines. Each segment starts its own pose tracker, so scores on a few frames may differ slightly from a single-worker run.',
+        'motion_threshold_label': 'Skip unchanged frames (% of pixels changed)',
+        'motion_threshold_help': 'Reuse the previous pose when at most this percentage of the image changed since the last analyzed frame (0 = analyze every frame). Around 0.2 suits fixed-camera desk and assembly work.',
+        'motion_max_reuse_label': 'Re-check pose at least every (seconds)',
+        'pose_model_label': 'Pose model',
+        'pose_model_help': 'Heavier models are more accurate but slower. Adaptive measures the speed while analyzing and switches between models to keep up with the minimum speed or finish within the time budget. Lite and Heavy are downloaded on first use.',
+        'pose_models': {0: 'Lite (fastest)', 1: 'Full', 2: 'Heavy (most accurate)', 'adaptive': 'Adaptive'},
+        'min_fps_label': 'Minimum analysis speed (frames/s, 0 = none)',
+        'time_budget_label': 'Time budget (minutes, 0 = none)',
+        'side_label': 'Body side scored',
+        'side_help': 'RULA scores one arm. Worse side keeps the higher-scoring arm in every frame; more visible side keeps the arm the camera sees best.',
+        'side_modes': {'right': 'Right', 'left': 'Left', 'worst': 'Worse side', 'visible': 'More visible side'},
     },
     'id': {
         'title': '🏥 SelarasSehat - Aplikasi Penilaian Ergonomis',
@@ -93,6 +148,7 @@ TRANSLATIONS = {
         'upload_label': 'Unggah Video',
         'upload_help': 'Unggah video (maksimal 30 detik direkomendasikan) yang menunjukkan aktivitas kerja dari tampak samping',
         'processing': 'Memproses video... Mohon tunggu',
+        'progress_text': '{frames_done}/{total_frames} frame, {fps:.1f} fps, pose terdeteksi {pose_rate:.0%}, sisa {eta}',
         'analysis_complete': 'Analisis Selesai!',
         'results_title': 'Hasil Penilaian RULA',
         'avg_score': 'Skor RULA Rata-rata',
@@ -104,6 +160,29 @@ TRANSLATIONS = {
         'annotated_video': 'Video Teranotasi dengan Deteksi Pose',
         'download_csv': 'Unduh Hasil Lengkap (CSV)',
         'download_video': 'Unduh Video Teranotasi',
+        'show_video': 'Tampilkan video teranotasi',
+        'prepare_video': 'Siapkan Video Teranotasi',
+        'rendering_video': 'Membuat video teranotasi...',
+        'video_profile_label': 'Output Video Teranotasi',
+        'video_profile_help': 'Pratinjau: setengah ukuran dan frame rate, kecil dan cepat diunduh, dapat diputar di browser. Standar: ukuran penuh, terkompresi. Penuh: ukuran dan frame rate asli sebagai MJPEG AVI (file besar).',
+        'video_profiles': {'preview': 'Pratinjau (kecil)', 'standard': 'Standar', 'full': 'Kualitas penuh (AVI)'},
+        'input_mode_label': 'Input',
+        'input_modes': {'upload': 'Unggah rekaman', 'live': 'Kamera / stream langsung'},
+        'live_source_label': 'Sumber video',
+        'live_source_help': 'Indeks kamera (mis. 0), URL stream (rtsp://, http://) atau path file video, diputar ulang sesuai frame rate aslinya',
+        'live_start': 'Mulai',
+        'live_stop': 'Berhenti',
+        'live_current_score': 'Skor RULA Saat Ini',
+        'live_fps': 'FPS Analisis',
+        'live_latency': 'Latensi (median)',
+        'live_dropped': 'Frame Terlewati',
+        'live_session_avg': 'Rata-rata Skor Sesi',
+        'exposure_title': 'Waktu Paparan Risiko',
+        'risk_level_time': 'Tingkat Risiko {level}',
+        'longest_high_risk': 'Risiko Tinggi Terlama Berturut-turut',
+        'timings_title': 'Rincian Waktu Pemrosesan',
+        'timings_steps': {'analysis': 'Analisis', 'render': 'Pembuatan video'},
+        'download_timings': 'Unduh Rincian Waktu (JSON)',
         'about_title': 'Tentang SelarasSehat',
         'about_text': '''
         SelarasSehat adalah alat penilaian ergonomis otomatis yang menggunakan computer vision 
@@ -153,9 +232,82 @@ TRANSLATIONS = {
         'force_light': '2-10 kg intermiten',
         'force_heavy': '2-10 kg statis/berulang, atau >10 kg intermiten',
         'force_shock': 'Kejutan atau peningkatan gaya cepat',
+        'frame_stride_label': 'Analisis setiap frame ke-N',
+        'frame_stride_help': 'Jalankan deteksi pose hanya pada setiap frame ke-N dan interpolasi frame di antaranya. Nilai lebih tinggi lebih cepat untuk rekaman panjang.',
+        'inference_width_label': 'Resolusi deteksi pose',
+        'inference_width_help': 'Perkecil frame ke lebar ini sebelum deteksi pose. Video teranotasi tetap memakai resolusi asli.',
+        'inference_width_original': 'Asli',
+        'workers_label': 'Proses paralel',
+        'workers_help': 'Bagi video menjadi segmen yang dianalisis oleh sejumlah proses ini. Gunakan lebih banyak proses untuk rekaman panjang pada mesin multi-core. Setiap segmen memulai pelacak pose sendiri, sehingga skor pada beberapa frame dapat sedikit berbeda dari analisis dengan satu proses.',
+        'motion_threshold_label': 'Lewati frame yang tidak berubah (% piksel berubah)',
+        'motion_threshold_help': 'Pakai ulang pose sebelumnya jika paling banyak persentase gambar ini berubah sejak frame terakhir yang dianalisis (0 = analisis setiap frame). Sekitar 0,2 cocok untuk kerja meja dan perakitan dengan kamera tetap.',
+        'motion_max_reuse_label': 'Periksa ulang pose paling lambat setiap (detik)',
+        'pose_model_label': 'Model pose',
+        'pose_model_help': 'Model yang lebih berat lebih akurat tetapi lebih lambat. Adaptif mengukur kecepatan selama analisis dan berganti model agar memenuhi kecepatan minimum atau selesai dalam batas waktu. Lite dan Heavy diunduh saat pertama dipakai.',
+        'pose_models': {0: 'Lite (tercepat)', 1: 'Full', 2: 'Heavy (paling akurat)', 'adaptive': 'Adaptif'},
+        'min_fps_label': 'Kecepatan analisis minimum (frame/detik, 0 = tidak ada)',
+        'time_budget_label': 'Batas waktu (menit, 0 = tidak ada)',
+        'side_label': 'Sisi tubuh yang dinilai',
+        'side_help': 'RULA menilai satu lengan. Sisi terburuk memakai lengan dengan skor lebih tinggi di setiap frame; sisi paling terlihat memakai lengan yang paling jelas terlihat kamera.',
+        'side_modes': {'right': 'Kanan', 'left': 'Kiri', 'worst': 'Sisi terburuk', 'visible': 'Sisi paling terlihat'},
     }
 }
 
+# Official RULA lookup tables, built once as dense arrays so a score is a single
+# indexed read. All indices are (component score - 1); they accept scalars or
+# whole NumPy arrays (fancy indexing).
+
+# Table A: Upper Arm (rows) x Lower Arm (cols), one block per Wrist position 1-4
+_TABLE_A_BY_WRIST = np.array([
+    [[1, 2, 2], [2, 2, 2], [2, 3, 3], [2, 3, 3], [3, 4, 4], [3, 4, 4]],  # Wrist 1
+    [[2, 2, 3], [2, 2, 3], [3, 3, 3], [3, 3, 4], [4, 4, 4], [4, 4, 4]],  # Wrist 2
+    [[2, 3, 3], [3, 3, 3], [3, 4, 4], [4, 4, 4], [4, 4, 5], [4, 4, 5]],  # Wrist 3
+    [[3, 3, 4], [3, 3, 4], [3, 4, 4], [4, 4, 4], [4, 4, 5], [4, 4, 5]],  # Wrist 4
+], dtype=np.int8)
+_TABLE_A = _TABLE_A_BY_WRIST.transpose(1, 2, 0)
+# [upper arm 1-6, lower arm 1-3, wrist 1-4, wrist twist 1-2]; twist at end of range adds 1
+RULA_TABLE_A = np.ascontiguousarray(np.stack([_TABLE_A, _TABLE_A + 1], axis=-1))
+
+# Table B: Neck (rows) x Trunk (cols), one block per Legs score 1-2
+_TABLE_B_BY_LEGS = np.array([
+    [[1, 2, 3, 5, 6, 7],  # Legs supported and balanced
+     [2, 2, 4, 5, 6, 7],
+     [3, 3, 4, 5, 6, 7],
+     [5, 5, 6, 7, 7, 7],
+     [7, 7, 7, 7, 7, 8],
+     [8, 8, 8, 8, 8, 8]],
+    [[1, 3, 4, 6, 7, 7],  # Legs not supported
+     [2, 3, 5, 6, 7, 7],
+     [3, 4, 5, 6, 7, 7],
+     [5, 6, 7, 7, 7, 8],
+     [7, 7, 7, 8, 8, 8],
+     [8, 8, 8, 8, 8, 8]],
+], dtype=np.int8)
+# [neck 1-6, trunk 1-6, legs 1-2]
+RULA_TABLE_B = np.ascontiguousarray(_TABLE_B_BY_LEGS.transpose(1, 2, 0))
+
+# Table C: Score A (rows) x Score B (cols) -> Grand Score
+# Score B of 8 is off the official table and always scores the maximum of 7
+RULA_TABLE_C = np.array([
+    [1, 2, 3, 3, 4, 5, 5, 7],
+    [2, 2, 3, 4, 4, 5, 5, 7],
+    [3, 3, 3, 4, 4, 6, 6, 7],
+    [3, 3, 3, 4, 5, 6, 6, 7],
+    [4, 4, 4, 5, 6, 7, 7, 7],
+    [4, 4, 5, 6, 6, 7, 7, 7],
+    [5, 5, 6, 6, 7, 7, 7, 7],
+    [5, 5, 6, 7, 7, 7, 7, 7],
+], dtype=np.int8)
+
+# Body sides with their MediaPipe shoulder, elbow, wrist and hip landmark indices
+SIDES = ('left', 'right')
+SIDE_LANDMARKS = {'left': (11, 13, 15, 23), 'right': (12, 14, 16, 24)}
+
+# How calculate_rula_batch picks the scored side of each frame: a fixed side, the side
+# with the higher score ('worst') or the side whose arm landmarks are more visible
+SIDE_MODES = ('right', 'left', 'worst', 'visible')
+
+
 class RULACalculator:
     """Calculate RULA scores from MediaPipe pose landmarks"""
     
@@ -194,34 +346,35 @@ class RULACalculator:
         return shoulder_hip_ratio < 0.25  # Threshold for raised shoulder
     
     @staticmethod
-    def detect_arm_abducted(landmarks):
+    def detect_arm_abducted(landmarks, side='right'):
         """Detect if arm is abducted (>20° away from body)"""
-        right_shoulder = landmarks[12]
-        right_elbow = landmarks[14]
-        right_hip = landmarks[24]
+        shoulder_index, elbow_index, _, hip_index = SIDE_LANDMARKS[side]
+        shoulder = landmarks[shoulder_index]
+        elbow = landmarks[elbow_index]
+        hip = landmarks[hip_index]
         
         # Calculate angle between shoulder-elbow and vertical
-        vertical_point = [right_shoulder.x, right_shoulder.y - 0.1, right_shoulder.z]
+        vertical_point = [shoulder.x, shoulder.y - 0.1, shoulder.z]
         
         # Vector from shoulder to elbow
-        elbow_vector_x = abs(right_elbow.x - right_shoulder.x)
+        elbow_vector_x = abs(elbow.x - shoulder.x)
         
         # If elbow is far from body horizontally (abducted)
         return elbow_vector_x > 0.15  # Threshold for abduction
     
     @staticmethod
-    def detect_working_across_midline(landmarks):
+    def detect_working_across_midline(landmarks, side='right'):
         """Detect if arm crosses body midline"""
+        shoulder_index, _, wrist_index, _ = SIDE_LANDMARKS[side]
         nose = landmarks[0]
-        right_shoulder = landmarks[12]
-        right_wrist = landmarks[16]
         
-        # Body midline is at nose x-coordinate
-        midline_x = nose.x
-        shoulder_x = right_shoulder.x
-        wrist_x = right_wrist.x
+        # Body midline is at nose x-coordinate; mirror the left side so it reads like the right
+        direction = 1 if side == 'right' else -1
+        midline_x = direction * nose.x
+        shoulder_x = direction * landmarks[shoulder_index].x
+        wrist_x = direction * landmarks[wrist_index].x
         
-        # If right arm crosses to left side of body
+        # If the arm crosses to the other side of the body
         if shoulder_x > midline_x and wrist_x < midline_x:
             return True
         # If working out to extreme side
@@ -231,14 +384,15 @@ class RULACalculator:
         return False
     
     @staticmethod
-    def detect_wrist_deviation(landmarks):
+    def detect_wrist_deviation(landmarks, side='right'):
         """Detect wrist radial/ulnar deviation"""
-        right_elbow = landmarks[14]
-        right_wrist = landmarks[16]
+        _, elbow_index, wrist_index, _ = SIDE_LANDMARKS[side]
+        elbow = landmarks[elbow_index]
+        wrist = landmarks[wrist_index]
         
         # Simple detection: if wrist is offset laterally from forearm line
-        elbow_wrist_x_diff = abs(right_elbow.x - right_wrist.x)
-        elbow_wrist_y_diff = abs(right_elbow.y - right_wrist.y)
+        elbow_wrist_x_diff = abs(elbow.x - wrist.x)
+        elbow_wrist_y_diff = abs(elbow.y - wrist.y)
         
         if elbow_wrist_y_diff > 0:
             deviation_ratio = elbow_wrist_x_diff / (elbow_wrist_y_diff + 1e-6)
@@ -413,89 +567,14 @@ class RULACalculator:
     @staticmethod
     def get_posture_score_a(upper_arm, lower_arm, wrist, wrist_twist):
         """Get posture score A from official RULA Table A"""
-        # Official RULA Table A: Upper Arm (rows) × Lower Arm (cols) for each Wrist position
-        # Wrist Position 1
-        table_a_wrist1 = {
-            (1, 1): 1, (1, 2): 2, (1, 3): 2,
-            (2, 1): 2, (2, 2): 2, (2, 3): 2,
-            (3, 1): 2, (3, 2): 3, (3, 3): 3,
-            (4, 1): 2, (4, 2): 3, (4, 3): 3,
-            (5, 1): 3, (5, 2): 4, (5, 3): 4,
-            (6, 1): 3, (6, 2): 4, (6, 3): 4,
-        }
-        # Wrist Position 2
-        table_a_wrist2 = {
-            (1, 1): 2, (1, 2): 2, (1, 3): 3,
-            (2, 1): 2, (2, 2): 2, (2, 3): 3,
-            (3, 1): 3, (3, 2): 3, (3, 3): 3,
-            (4, 1): 3, (4, 2): 3, (4, 3): 4,
-            (5, 1): 4, (5, 2): 4, (5, 3): 4,
-            (6, 1): 4, (6, 2): 4, (6, 3): 4,
-        }
-        # Wrist Position 3
-        table_a_wrist3 = {
-            (1, 1): 2, (1, 2): 3, (1, 3): 3,
-            (2, 1): 3, (2, 2): 3, (2, 3): 3,
-            (3, 1): 3, (3, 2): 4, (3, 3): 4,
-            (4, 1): 4, (4, 2): 4, (4, 3): 4,
-            (5, 1): 4, (5, 2): 4, (5, 3): 5,
-            (6, 1): 4, (6, 2): 4, (6, 3): 5,
-        }
-        # Wrist Position 4
-        table_a_wrist4 = {
-            (1, 1): 3, (1, 2): 3, (1, 3): 4,
-            (2, 1): 3, (2, 2): 3, (2, 3): 4,
-            (3, 1): 3, (3, 2): 4, (3, 3): 4,
-            (4, 1): 4, (4, 2): 4, (4, 3): 4,
-            (5, 1): 4, (5, 2): 4, (5, 3): 5,
-            (6, 1): 4, (6, 2): 4, (6, 3): 5,
-        }
-        
-        # Select correct table based on wrist position
-        tables = {1: table_a_wrist1, 2: table_a_wrist2, 3: table_a_wrist3, 4: table_a_wrist4}
-        table = tables.get(min(wrist, 4), table_a_wrist4)
-        
-        # Look up score
-        key = (min(upper_arm, 6), min(lower_arm, 3))
-        score_a = table.get(key, 4)
-        
-        # Add wrist twist adjustment (+1 if at end of range)
-        if wrist_twist == 2:
-            score_a += 1
-            
-        return score_a
+        key = (min(upper_arm, 6) - 1, min(lower_arm, 3) - 1, min(wrist, 4) - 1, int(wrist_twist == 2))
+        return int(RULA_TABLE_A[key])
     
     @staticmethod
     def get_posture_score_b(neck, trunk, legs):
         """Get posture score B from official RULA Table B"""
-        # Official RULA Table B: Neck (rows) × Trunk (cols)
-        # Legs = 1 (supported and balanced)
-        table_b_legs1 = {
-            (1, 1): 1, (1, 2): 2, (1, 3): 3, (1, 4): 5, (1, 5): 6, (1, 6): 7,
-            (2, 1): 2, (2, 2): 2, (2, 3): 4, (2, 4): 5, (2, 5): 6, (2, 6): 7,
-            (3, 1): 3, (3, 2): 3, (3, 3): 4, (3, 4): 5, (3, 5): 6, (3, 6): 7,
-            (4, 1): 5, (4, 2): 5, (4, 3): 6, (4, 4): 7, (4, 5): 7, (4, 6): 7,
-            (5, 1): 7, (5, 2): 7, (5, 3): 7, (5, 4): 7, (5, 5): 7, (5, 6): 8,
-            (6, 1): 8, (6, 2): 8, (6, 3): 8, (6, 4): 8, (6, 5): 8, (6, 6): 8,
-        }
-        # Legs = 2 (not supported)
-        table_b_legs2 = {
-            (1, 1): 1, (1, 2): 3, (1, 3): 4, (1, 4): 6, (1, 5): 7, (1, 6): 7,
-            (2, 1): 2, (2, 2): 3, (2, 3): 5, (2, 4): 6, (2, 5): 7, (2, 6): 7,
-            (3, 1): 3, (3, 2): 4, (3, 3): 5, (3, 4): 6, (3, 5): 7, (3, 6): 7,
-            (4, 1): 5, (4, 2): 6, (4, 3): 7, (4, 4): 7, (4, 5): 7, (4, 6): 8,
-            (5, 1): 7, (5, 2): 7, (5, 3): 7, (5, 4): 8, (5, 5): 8, (5, 6): 8,
-            (6, 1): 8, (6, 2): 8, (6, 3): 8, (6, 4): 8, (6, 5): 8, (6, 6): 8,
-        }
-        
-        # Select correct table based on legs
-        table = table_b_legs1 if legs == 1 else table_b_legs2
-        
-        # Look up score
-        key = (min(neck, 6), min(trunk, 6))
-        score_b = table.get(key, 6)
-            
-        return score_b
+        key = (min(neck, 6) - 1, min(trunk, 6) - 1, int(legs != 1))
+        return int(RULA_TABLE_B[key])
     
     @staticmethod
     def get_final_score(score_a, score_b, muscle_use=0, force_load=0):
@@ -504,26 +583,29 @@ class RULACalculator:
         final_score_a = score_a + muscle_use + force_load
         final_score_b = score_b + muscle_use + force_load
         
-        # Official RULA Table C: Score A × Score B → Grand Score
-        table_c = {
-            (1, 1): 1, (1, 2): 2, (1, 3): 3, (1, 4): 3, (1, 5): 4, (1, 6): 5, (1, 7): 5,
-            (2, 1): 2, (2, 2): 2, (2, 3): 3, (2, 4): 4, (2, 5): 4, (2, 6): 5, (2, 7): 5,
-            (3, 1): 3, (3, 2): 3, (3, 3): 3, (3, 4): 4, (3, 5): 4, (3, 6): 6, (3, 7): 6,
-            (4, 1): 3, (4, 2): 3, (4, 3): 3, (4, 4): 4, (4, 5): 5, (4, 6): 6, (4, 7): 6,
-            (5, 1): 4, (5, 2): 4, (5, 3): 4, (5, 4): 5, (5, 5): 6, (5, 6): 7, (5, 7): 7,
-            (6, 1): 4, (6, 2): 4, (6, 3): 5, (6, 4): 6, (6, 5): 6, (6, 6): 7, (6, 7): 7,
-            (7, 1): 5, (7, 2): 5, (7, 3): 6, (7, 4): 6, (7, 5): 7, (7, 6): 7, (7, 7): 7,
-            (8, 1): 5, (8, 2): 5, (8, 3): 6, (8, 4): 7, (8, 5): 7, (8, 6): 7, (8, 7): 7,
-        }
-        
-        key = (min(final_score_a, 8), min(final_score_b, 8))
-        grand_score = table_c.get(key, 7)
-        
-        return min(grand_score, 7)  # RULA max is 7
+        key = (min(final_score_a, 8) - 1, min(final_score_b, 8) - 1)
+        return int(RULA_TABLE_C[key])
     
     @classmethod
-    def calculate_rula_from_landmarks(cls, landmarks):
-        """Calculate RULA score from MediaPipe landmarks with automatic adjustments"""
+    def calculate_rula_from_landmarks(cls, landmarks, side='right'):
+        """Calculate RULA score from MediaPipe landmarks with automatic adjustments
+        
+        `side` is one of SIDE_MODES; 'worst' and 'visible' score both sides and keep
+        one, as calculate_rula_batch does. The result's 'side' names the scored side.
+        """
+        if side in ('worst', 'visible'):
+            both = [cls.calculate_rula_from_landmarks(landmarks, body_side) for body_side in SIDES]
+            if None in both:
+                return None
+            left, right = both
+            if side == 'worst':
+                left_wins = (left['rula_score'], left['score_a']) > (right['rula_score'], right['score_a'])
+            else:
+                left_wins = sum(landmarks[i].visibility for i in SIDE_LANDMARKS['left'][:3]) > sum(
+                    landmarks[i].visibility for i in SIDE_LANDMARKS['right'][:3]
+                )
+            return left if left_wins else right
+        
         try:
             # Extract key points (using MediaPipe pose landmark indices)
             left_shoulder = [landmarks[11].x, landmarks[11].y, landmarks[11].z]
@@ -536,11 +618,10 @@ class RULACalculator:
             right_hip = [landmarks[24].x, landmarks[24].y, landmarks[24].z]
             nose = [landmarks[0].x, landmarks[0].y, landmarks[0].z]
             
-            # Calculate angles - using right side
-            shoulder = right_shoulder
-            elbow = right_elbow
-            wrist = right_wrist
-            hip = right_hip
+            # Calculate angles - using the requested side
+            shoulder, elbow, wrist, hip = (left_shoulder, left_elbow, left_wrist, left_hip) if side == 'left' else (
+                right_shoulder, right_elbow, right_wrist, right_hip
+            )
             
             # UPPER ARM ANGLE: Angle from vertical (0° = arm hanging down, 90° = horizontal)
             # Calculate angle between vertical and upper arm
@@ -609,9 +690,9 @@ class RULACalculator:
             
             # AUTO-DETECT ADJUSTMENTS
             upper_arm_raised = cls.detect_shoulder_raised(landmarks)
-            upper_arm_abducted = cls.detect_arm_abducted(landmarks)
-            lower_arm_midline = cls.detect_working_across_midline(landmarks)
-            wrist_deviated = cls.detect_wrist_deviation(landmarks)
+            upper_arm_abducted = cls.detect_arm_abducted(landmarks, side)
+            lower_arm_midline = cls.detect_working_across_midline(landmarks, side)
+            wrist_deviated = cls.detect_wrist_deviation(landmarks, side)
             neck_twisted = cls.detect_neck_twisted(landmarks)
             neck_bent = cls.detect_neck_side_bent(landmarks)
             trunk_twisted = cls.detect_trunk_twisted(landmarks)
@@ -652,242 +733,2643 @@ class RULACalculator:
                 'neck_bent': neck_bent,
                 'trunk_twisted': trunk_twisted,
                 'trunk_bent': trunk_bent,
+                'side': side,
             }
         except Exception as e:
             return None
-
-
-def process_video(video_path, progress_bar=None):
-    """Process video and calculate RULA scores"""
-    mp_pose = mp.solutions.pose
-    mp_drawing = mp.solutions.drawing_utils
     
-    cap = cv2.VideoCapture(video_path)
-    fps = int(cap.get(cv2.CAP_PROP_FPS))
-    fps = max(fps, 15)  # Ensure minimum fps
-    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    # ------------------------------------------------------------------
+    # Batch (vectorized) API: same rules as above, applied to whole arrays
+    # ------------------------------------------------------------------
     
-    # Store frames in memory first, then write
-    processed_frames = []
+    @staticmethod
+    def calculate_angle_batch(point1, point2, point3):
+        """Calculate angles at point2 for (..., 3) arrays of points"""
+        ba = point1 - point2
+        bc = point3 - point2
+        
+        cosine_angle = np.sum(ba * bc, axis=-1) / (
+            np.linalg.norm(ba, axis=-1) * np.linalg.norm(bc, axis=-1) + 1e-6
+        )
+        cosine_angle = np.clip(cosine_angle, -1.0, 1.0)
+        return np.degrees(np.arccos(cosine_angle))
     
-    results_data = []
-    frame_count = 0
+    @staticmethod
+    def detect_adjustments_batch(landmarks, side='right'):
+        """Detect all automatic adjustments for an (N, 33, >=2) landmark array
+        
+        The arm adjustments are for `side`, or with side=None for both sides at once
+        as (N, 2) arrays in SIDES order.
+        """
+        x = landmarks[..., 0]
+        y = landmarks[..., 1]
+        
+        nose_x = x[:, 0]
+        shoulder_mid_x = (x[:, 11] + x[:, 12]) / 2
+        hip_mid_x = (x[:, 23] + x[:, 24]) / 2
+        shoulder_y = (y[:, 11] + y[:, 12]) / 2
+        hip_y = (y[:, 23] + y[:, 24]) / 2
+        
+        # Arm shoulder, elbow and wrist of the side(s); the left side is mirrored to read like the right
+        sides = SIDES if side is None else (side,)
+        shoulder, elbow, wrist = np.array([SIDE_LANDMARKS[body_side][:3] for body_side in sides]).T
+        direction = np.array([1 if body_side == 'right' else -1 for body_side in sides])
+        
+        elbow_wrist_x_diff = np.abs(x[:, elbow] - x[:, wrist])
+        elbow_wrist_y_diff = np.abs(y[:, elbow] - y[:, wrist])
+        
+        shoulder_width = np.abs(x[:, 11] - x[:, 12])
+        hip_width = np.abs(x[:, 23] - x[:, 24])
+        
+        crosses_midline = (direction * x[:, shoulder] > direction * nose_x[:, None]) & (
+            direction * x[:, wrist] < direction * nose_x[:, None]
+        )
+        out_to_side = np.abs(x[:, wrist] - x[:, shoulder]) > 0.3
+        
+        arm = {
+            'upper_arm_abducted': np.abs(x[:, elbow] - x[:, shoulder]) > 0.15,
+            'lower_arm_midline': crosses_midline | out_to_side,
+            'wrist_deviated': (elbow_wrist_y_diff > 0)
+                              & (elbow_wrist_x_diff / (elbow_wrist_y_diff + 1e-6) > 0.3),
+        }
+        if side is not None:
+            arm = {name: values[:, 0] for name, values in arm.items()}
+        
+        return {
+            'upper_arm_raised': np.abs(shoulder_y - hip_y) < 0.25,
+            **arm,
+            'neck_twisted': np.abs(nose_x - shoulder_mid_x) > 0.05,
+            'neck_bent': np.abs(y[:, 11] - y[:, 12]) > 0.08,
+            'trunk_twisted': np.abs(shoulder_width - hip_width) / (hip_width + 1e-6) > 0.3,
+            'trunk_bent': np.abs(shoulder_mid_x - hip_mid_x) > 0.08,
+        }
     
-    with mp_pose.Pose(
-        static_image_mode=False,
-        model_complexity=1,
-        min_detection_confidence=0.5,
-        min_tracking_confidence=0.5
-    ) as pose:
+    @staticmethod
+    def get_upper_arm_score_batch(angle, raised=False, abducted=False):
+        """Calculate upper arm RULA scores for an array of angles"""
+        angle = np.asarray(angle)
+        score = np.select([angle < 20, angle <= 45, angle <= 90], [1, 2, 3], default=4)
+        return score + np.asarray(raised, dtype=int) + np.asarray(abducted, dtype=int)
+    
+    @staticmethod
+    def get_lower_arm_score_batch(angle, working_across_midline=False):
+        """Calculate lower arm RULA scores for an array of angles"""
+        angle = np.asarray(angle)
+        score = np.where((angle >= 60) & (angle <= 100), 1, 2)
+        return score + np.asarray(working_across_midline, dtype=int)
+    
+    @staticmethod
+    def get_wrist_score_batch(angle, deviated=False):
+        """Calculate wrist RULA scores for an array of angles"""
+        score = np.where(np.abs(angle) <= 15, 1, 2) + np.asarray(deviated, dtype=int)
+        return np.minimum(score, 4)
+    
+    @staticmethod
+    def get_neck_score_batch(angle, twisted=False, side_bent=False):
+        """Calculate neck RULA scores for an array of angles"""
+        angle = np.asarray(angle)
+        score = np.select(
+            [(angle >= 0) & (angle < 10), (angle >= 10) & (angle <= 20), angle > 20],
+            [1, 2, 3],
+            default=4  # extension
+        )
+        return score + (np.asarray(twisted) | np.asarray(side_bent)).astype(int)
+    
+    @staticmethod
+    def get_trunk_score_batch(angle, twisted=False, side_bent=False):
+        """Calculate trunk RULA scores for an array of angles"""
+        angle = np.asarray(angle)
+        score = np.select(
+            [(angle >= 0) & (angle < 10), (angle >= 10) & (angle <= 20), (angle > 20) & (angle <= 60)],
+            [1, 2, 3],
+            default=4
+        )
+        return score + (np.asarray(twisted) | np.asarray(side_bent)).astype(int)
+    
+    @staticmethod
+    def get_posture_score_a_batch(upper_arm, lower_arm, wrist, wrist_twist):
+        """Get posture scores A for arrays of component scores"""
+        return RULA_TABLE_A[
+            np.clip(upper_arm, 1, 6) - 1,
+            np.clip(lower_arm, 1, 3) - 1,
+            np.clip(wrist, 1, 4) - 1,
+            (np.asarray(wrist_twist) == 2).astype(int)
+        ]
+    
+    @staticmethod
+    def get_posture_score_b_batch(neck, trunk, legs):
+        """Get posture scores B for arrays of component scores"""
+        return RULA_TABLE_B[
+            np.clip(neck, 1, 6) - 1,
+            np.clip(trunk, 1, 6) - 1,
+            (np.asarray(legs) != 1).astype(int)
+        ]
+    
+    @staticmethod
+    def get_final_score_batch(score_a, score_b, muscle_use=0, force_load=0):
+        """Get final RULA scores for arrays of posture scores"""
+        final_score_a = np.asarray(score_a) + muscle_use + force_load
+        final_score_b = np.asarray(score_b) + muscle_use + force_load
+        return RULA_TABLE_C[np.clip(final_score_a, 1, 8) - 1, np.clip(final_score_b, 1, 8) - 1]
+    
+    @classmethod
+    def _score_batch(cls, upper_arm_angle, lower_arm_angle, wrist_angle, neck_angle, trunk_angle,
+                     upper_arm_raised, upper_arm_abducted, lower_arm_midline, wrist_deviated,
+                     neck_twisted, neck_bent, trunk_twisted, trunk_bent, wrist_twist, legs_score,
+                     muscle_use, force_load):
+        """Score angle arrays; adjustments may be per-frame arrays or scalars"""
+        upper_arm_score = cls.get_upper_arm_score_batch(upper_arm_angle, upper_arm_raised, upper_arm_abducted)
+        lower_arm_score = cls.get_lower_arm_score_batch(lower_arm_angle, lower_arm_midline)
+        wrist_score = cls.get_wrist_score_batch(wrist_angle, wrist_deviated)
         
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
-            
-            frame_count += 1
-            if progress_bar:
-                progress_bar.progress(frame_count / total_frames)
-            
-            # Convert to RGB
-            image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            image.flags.writeable = False
-            
-            # Process with MediaPipe
-            results = pose.process(image)
-            
-            # Convert back to BGR
-            image.flags.writeable = True
-            image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
-            
-            rula_score = None
-            if results.pose_landmarks:
-                # Calculate RULA
-                rula_data = RULACalculator.calculate_rula_from_landmarks(results.pose_landmarks.landmark)
-                
-                if rula_data:
-                    rula_score = rula_data['rula_score']
-                    
-                    # Store results
-                    results_data.append({
-                        'frame': frame_count,
-                        'time_sec': frame_count / fps,
-                        'rula_score': rula_score,
-                        **rula_data
-                    })
-                    
-                    # DON'T draw score on frame - removed for cleaner video
-                
-                # Draw pose landmarks
-                mp_drawing.draw_landmarks(
-                    image,
-                    results.pose_landmarks,
-                    mp_pose.POSE_CONNECTIONS,
-                    mp_drawing.DrawingSpec(color=(245, 117, 66), thickness=2, circle_radius=2),
-                    mp_drawing.DrawingSpec(color=(245, 66, 230), thickness=2, circle_radius=2)
-                )
-            
-            # Store frame
-            processed_frames.append(image.copy())
+        neck_score = cls.get_neck_score_batch(neck_angle, neck_twisted, neck_bent)
+        trunk_score = cls.get_trunk_score_batch(trunk_angle, trunk_twisted, trunk_bent)
+        
+        score_a = cls.get_posture_score_a_batch(upper_arm_score, lower_arm_score, wrist_score, wrist_twist)
+        score_b = cls.get_posture_score_b_batch(neck_score, trunk_score, legs_score)
+        final_score = cls.get_final_score_batch(score_a, score_b, muscle_use, force_load)
+        
+        return {
+            'rula_score': final_score,
+            'upper_arm_score': upper_arm_score,
+            'lower_arm_score': lower_arm_score,
+            'wrist_score': wrist_score,
+            'neck_score': neck_score,
+            'trunk_score': trunk_score,
+            'score_a': score_a,
+            'score_b': score_b,
+        }
     
-    cap.release()
+    @classmethod
+    def recalculate_rula_batch(cls, upper_arm_angle, lower_arm_angle, wrist_angle, neck_angle, trunk_angle,
+                               upper_arm_raised, upper_arm_abducted, lower_arm_midline, wrist_deviated,
+                               neck_twisted, neck_bent, trunk_twisted, trunk_bent, wrist_twist, legs_score,
+                               muscle_use, force_load):
+        """Recalculate RULA with manual adjustments for whole angle columns at once"""
+        scores = cls._score_batch(
+            np.asarray(upper_arm_angle), np.asarray(lower_arm_angle), np.asarray(wrist_angle),
+            np.asarray(neck_angle), np.asarray(trunk_angle),
+            upper_arm_raised, upper_arm_abducted, lower_arm_midline, wrist_deviated,
+            neck_twisted, neck_bent, trunk_twisted, trunk_bent, wrist_twist, legs_score,
+            muscle_use, force_load
+        )
+        
+        return scores['rula_score'], scores['score_a'], scores['score_b']
+    
+    @classmethod
+    def calculate_rula_batch(cls, landmarks, side='right'):
+        """Calculate RULA scores for an (N, 33, 4) landmark array in one vectorized pass
+        
+        Returns a dict of columnar arrays (angles, auto-detected adjustments, component,
+        A, B and final scores) matching calculate_rula_from_landmarks frame by frame.
+        
+        Both arms are scored together as (N, 2) arrays, sharing the neck and trunk
+        work, and each frame keeps one side according to `side` (see SIDE_MODES):
+        'worst' keeps the higher final score (then score A), 'visible' the arm whose
+        shoulder, elbow and wrist visibility adds up higher; ties go to the right.
+        The 'side' array holds the index into SIDES of the kept side.
+        """
+        if side not in SIDE_MODES:
+            raise Exception(f"Unknown side {side!r}, expected one of {', '.join(SIDE_MODES)}")
+        
+        # Work in float64 so results match the per-frame path exactly
+        landmarks = np.asarray(landmarks, dtype=np.float64)
+        points = landmarks[..., :3]
+        
+        nose = points[:, 0]
+        neck_base = (points[:, 11] + points[:, 12]) / 2
+        hip_mid = (points[:, 23] + points[:, 24]) / 2
+        
+        # Both arms at once: (N, 2, 3) shoulder, elbow and wrist points, in SIDES order
+        arm_indices = np.array([SIDE_LANDMARKS[body_side][:3] for body_side in SIDES])
+        shoulder, elbow, wrist = (points[:, arm_indices[:, joint]] for joint in range(3))
+        
+        vertical = np.array([0.0, 0.2, 0.0])
+        
+        # UPPER ARM ANGLE: deviation of the upper arm from hanging vertically
+        upper_arm_angle = np.abs(cls.calculate_angle_batch(shoulder + vertical, shoulder, elbow))
+        
+        # LOWER ARM ANGLE: Elbow flexion angle
+        lower_arm_angle = cls.calculate_angle_batch(shoulder, elbow, wrist)
+        
+        # WRIST ANGLE: deviation from the forearm line
+        forearm_extension = wrist.copy()
+        forearm_extension[..., :2] += (wrist[..., :2] - elbow[..., :2]) * 0.1
+        wrist_angle = np.abs(cls.calculate_angle_batch(elbow, wrist, forearm_extension) - 180)
+        
+        # NECK ANGLE: positive = flexion (nose below shoulders), negative = extension
+        neck_angle = np.abs(cls.calculate_angle_batch(neck_base - vertical, neck_base, nose))
+        neck_angle = np.where(nose[:, 1] > neck_base[:, 1], neck_angle, -neck_angle)
+        
+        # TRUNK ANGLE: deviation from upright
+        trunk_angle = np.abs(cls.calculate_angle_batch(hip_mid + vertical, hip_mid, neck_base))
+        
+        # Ensure angles are in reasonable ranges; body columns get a side axis to broadcast against the arms
+        angles = {
+            'upper_arm_angle': np.minimum(upper_arm_angle, 180),
+            'lower_arm_angle': np.clip(lower_arm_angle, 0, 180),
+            'wrist_angle': np.minimum(wrist_angle, 90),
+            'neck_angle': np.clip(neck_angle, -45, 90)[:, None],
+            'trunk_angle': np.minimum(trunk_angle, 90)[:, None],
+        }
+        
+        adjustments = {
+            name: values if values.ndim == 2 else values[:, None]
+            for name, values in cls.detect_adjustments_batch(points, side=None).items()
+        }
+        
+        # Wrist twist mid-range, legs supported, no muscle/force (need manual input)
+        scores = cls._score_batch(**angles, **adjustments, wrist_twist=1, legs_score=1,
+                                  muscle_use=0, force_load=0)
+        
+        # Keep one side per frame
+        if side == 'worst':
+            final, score_a = scores['rula_score'], scores['score_a']
+            chosen = (final[:, 0] > final[:, 1]) | ((final[:, 0] == final[:, 1]) & (score_a[:, 0] > score_a[:, 1]))
+            chosen = np.where(chosen, 0, 1)
+        elif side == 'visible':
+            visibility = landmarks[:, arm_indices, 3].sum(axis=-1)
+            chosen = np.where(visibility[:, 0] > visibility[:, 1], 0, 1)
+        else:
+            chosen = np.full(len(points), SIDES.index(side))
+        
+        rows = np.arange(len(points))
+        columns = {
+            name: values[rows, chosen] if values.shape[1] == 2 else values[:, 0]
+            for name, values in {**scores, **angles, **adjustments}.items()
+        }
+        columns['side'] = chosen.astype(np.int8)
+        return columns
+
+
+class ColumnStore:
+    """Growable typed column arrays sharing one row count
+    
+    Columns are preallocated for `capacity` rows and doubled when full, so rows are
+    appended in amortised O(1) without per-row Python objects. `shapes` gives the
+    per-row shape of array-valued columns, e.g. {'landmarks': (33, 4)}, and
+    `categories` the labels of integer-coded columns, e.g. {'side': SIDES}.
+    """
+    
+    def __init__(self, dtypes, capacity=1024, shapes=None, categories=None):
+        self.dtypes = dict(dtypes)
+        self.shapes = shapes or {}
+        self.categories = categories or {}
+        self.size = 0
+        self._arrays = {
+            name: np.empty((max(capacity, 1), *self.shapes.get(name, ())), dtype=dtype)
+            for name, dtype in self.dtypes.items()
+        }
     
-    # Write frames to AVI file with MJPEG codec (browser-compatible)
-    output_path = tempfile.NamedTemporaryFile(delete=False, suffix='.avi').name
+    def __len__(self):
+        return self.size
     
-    # Use MJPEG codec - works without FFmpeg
-    fourcc = cv2.VideoWriter_fourcc(*'MJPG')
-    out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
+    @property
+    def capacity(self):
+        return len(next(iter(self._arrays.values())))
     
-    if not out.isOpened():
-        raise Exception("Could not create video output")
+    def _reserve(self, rows):
+        if rows <= self.capacity:
+            return
+        capacity = max(rows, 2 * self.capacity)
+        for name, array in self._arrays.items():
+            grown = np.empty((capacity, *array.shape[1:]), dtype=array.dtype)
+            grown[:self.size] = array[:self.size]
+            self._arrays[name] = grown
     
-    # Write all frames
-    for frame in processed_frames:
-        out.write(frame)
+    def append(self, **row):
+        self._reserve(self.size + 1)
+        for name, value in row.items():
+            self._arrays[name][self.size] = value
+        self.size += 1
     
-    out.release()
+    def extend(self, **columns):
+        rows = len(next(iter(columns.values())))
+        self._reserve(self.size + rows)
+        for name, values in columns.items():
+            self._arrays[name][self.size:self.size + rows] = values
+        self.size += rows
     
-    # Verify video was created
-    if not os.path.exists(output_path):
-        raise Exception("Video file was not created")
+    def compact(self):
+        """Drop the unused capacity, e.g. before keeping the store around"""
+        if self.size < self.capacity:
+            self._arrays = {name: array[:self.size].copy() for name, array in self._arrays.items()}
+        return self
     
-    return output_path, pd.DataFrame(results_data)
+    def columns(self):
+        """The filled part of every column, as views"""
+        return {name: array[:self.size] for name, array in self._arrays.items()}
+    
+    def to_dataframe(self):
+        """DataFrame over the column arrays, without copying them; coded columns become categoricals"""
+        columns = self.columns()
+        for name, labels in self.categories.items():
+            columns[name] = pd.Categorical.from_codes(columns[name], categories=labels)
+        return pd.DataFrame(columns, copy=False)
+    
+    @property
+    def nbytes(self):
+        return sum(array.nbytes for array in self._arrays.values())
 
 
-def create_score_timeline(df, lang='en'):
-    """Create interactive timeline plot"""
-    fig = go.Figure()
+# Sampled landmarks of the inferred frames, NaN rows where no pose was detected
+LANDMARK_DTYPES = {'frame': np.int64, 'landmarks': np.float32, 'reused': np.bool_, 'model_complexity': np.int8}
+LANDMARK_SHAPES = {'landmarks': (33, 4)}
+
+
+# Per-frame columns of results_df, in export order
+RESULT_COLUMNS = [
+    'rula_score', 'upper_arm_angle', 'lower_arm_angle', 'wrist_angle', 'neck_angle', 'trunk_angle',
+    'score_a', 'score_b',
+    'upper_arm_raised', 'upper_arm_abducted', 'lower_arm_midline', 'wrist_deviated',
+    'neck_twisted', 'neck_bent', 'trunk_twisted', 'trunk_bent',
+]
+
+# Compact column types of the results table: float32 angles, int8 scores, 1-byte flags
+RESULT_DTYPES = {
+    'frame': np.int32,
+    'time_sec': np.float64,
+    'rula_score': np.int8,
+    **{column: np.float32 for column in RESULT_COLUMNS[1:6]},
+    'score_a': np.int8,
+    'score_b': np.int8,
+    **{column: np.bool_ for column in RESULT_COLUMNS[8:]},
+    'measured': np.bool_,
+    'reused': np.bool_,
+    'model_complexity': np.int8,
+    'side': np.int8,
+}
+
+# Labels of the integer-coded result columns
+RESULT_CATEGORIES = {'side': SIDES}
+
+
+def landmarks_to_array(landmarks):
+    """Convert MediaPipe pose landmarks to a (33, 4) float32 array of x, y, z, visibility"""
+    return np.array([[lm.x, lm.y, lm.z, lm.visibility] for lm in landmarks], dtype=np.float32)
+
+
+def build_results(frames, landmarks, fps, measured=None, reused=None, model_complexity=1, side='right'):
+    """Score an (N, 33, 4) landmark array into a ColumnStore of RESULT_DTYPES columns
     
-    fig.add_trace(go.Scatter(
-        x=df['time_sec'],
-        y=df['rula_score'],
-        mode='lines+markers',
-        name='RULA Score',
-        line=dict(color='rgb(0, 123, 255)', width=2),
-        marker=dict(size=6)
-    ))
+    `measured` marks rows whose landmarks came from pose inference rather than
+    being filled in for a skipped frame (defaults to all measured). `reused`
+    marks measured rows whose frame was unchanged, so the landmarks (and hence
+    the RULA row) of the last inferred frame were reused (defaults to none).
+    `model_complexity` is the Pose model behind each row, or one for all rows.
+    `side` is the body side scored (see SIDE_MODES).
+    """
+    frames = np.asarray(frames)
+    results = ColumnStore(RESULT_DTYPES, capacity=len(frames), categories=RESULT_CATEGORIES)
+    if len(frames) == 0:
+        return results
     
-    # Add risk level zones
-    fig.add_hrect(y0=0, y1=2, fillcolor="green", opacity=0.1, line_width=0)
-    fig.add_hrect(y0=2, y1=3, fillcolor="yellow", opacity=0.1, line_width=0)
-    fig.add_hrect(y0=3, y1=5, fillcolor="orange", opacity=0.1, line_width=0)
-    fig.add_hrect(y0=5, y1=7, fillcolor="red", opacity=0.1, line_width=0)
+    if measured is None:
+        measured = np.ones(len(frames), dtype=bool)
+    if reused is None:
+        reused = np.zeros(len(frames), dtype=bool)
     
-    fig.update_layout(
-        title=TRANSLATIONS[lang]['score_timeline'],
-        xaxis_title='Time (seconds)' if lang == 'en' else 'Waktu (detik)',
-        yaxis_title='RULA Score' if lang == 'en' else 'Skor RULA',
-        yaxis=dict(range=[0, 7.5], dtick=1),
-        hovermode='x unified',
-        height=400
+    rula_data = RULACalculator.calculate_rula_batch(landmarks, side)
+    results.extend(
+        frame=frames,
+        time_sec=frames / fps,
+        **{column: rula_data[column] for column in RESULT_COLUMNS},
+        measured=measured,
+        reused=reused,
+        model_complexity=np.broadcast_to(model_complexity, len(frames)),
+        side=rula_data['side']
     )
+    return results
+
+
+def build_results_df(frames, landmarks, fps, measured=None, reused=None, model_complexity=1, side='right'):
+    """Score an (N, 33, 4) landmark array and build the per-frame results table"""
+    return build_results(frames, landmarks, fps, measured, reused, model_complexity, side).to_dataframe()
+
+
+# RULA risk level (1-4) of each final score 0-7, as in get_risk_level()
+RISK_LEVEL_BY_SCORE = np.array([1, 1, 1, 2, 2, 3, 3, 4])
+HIGH_RISK_LEVEL = 4
+
+
+class RunningStats:
+    """O(1)-memory running aggregates of RULA results
     
-    return fig
+    Keeps the mean, min and max score, a histogram of scores 1-7, seconds spent in
+    each risk level, the longest continuous time at high risk (level 4) and how
+    often each auto-detected adjustment flag was set. Rows are fed in chunks of any
+    size with update(); rows more than `max_gap_sec` apart (e.g. no pose detected
+    in between) end a continuous run.
+    """
+    
+    def __init__(self, max_gap_sec=1.0, flag_columns=tuple(RESULT_COLUMNS[8:])):
+        self.max_gap_sec = max_gap_sec
+        self.count = 0
+        self.seconds = 0.0
+        self.score_sum = 0
+        self.score_min = None
+        self.score_max = None
+        self.histogram = np.zeros(8, dtype=np.int64)  # Indexed by score
+        self.risk_seconds = np.zeros(5)  # Indexed by risk level
+        self.flag_counts = dict.fromkeys(flag_columns, 0)
+        self.longest_high_risk_sec = 0.0
+        self._run_sec = 0.0  # Length of the high-risk run still open at the last row
+        self._last_time = None
+        self._last_high = False
+    
+    def update(self, time_sec, rula_score, duration, **flags):
+        """Add rows: their times, final scores, seconds each row stands for, and flag columns"""
+        time_sec = np.atleast_1d(np.asarray(time_sec, dtype=np.float64))
+        scores = np.atleast_1d(np.asarray(rula_score, dtype=np.int64))
+        duration = np.broadcast_to(np.asarray(duration, dtype=np.float64), scores.shape)
+        if len(scores) == 0:
+            return
+        
+        self.count += len(scores)
+        self.seconds += float(duration.sum())
+        self.score_sum += int(scores.sum())
+        low, high = int(scores.min()), int(scores.max())
+        self.score_min = low if self.score_min is None else min(self.score_min, low)
+        self.score_max = high if self.score_max is None else max(self.score_max, high)
+        self.histogram += np.bincount(scores, minlength=8)[:8]
+        
+        levels = RISK_LEVEL_BY_SCORE[np.clip(scores, 0, 7)]
+        self.risk_seconds += np.bincount(levels, weights=duration, minlength=5)
+        for name, values in flags.items():
+            self.flag_counts[name] += int(np.count_nonzero(values))
+        
+        # Continuous high-risk runs: a run starts at a high-risk row after a gap or a lower-risk row
+        is_high = levels == HIGH_RISK_LEVEL
+        gap = np.empty(len(scores), dtype=bool)
+        gap[0] = self._last_time is None or time_sec[0] - self._last_time > self.max_gap_sec
+        gap[1:] = np.diff(time_sec) > self.max_gap_sec
+        previous_high = np.concatenate([[self._last_high], is_high[:-1]])
+        starts = is_high & (gap | ~previous_high)
+        
+        run_ids = np.cumsum(starts)  # 0 for rows continuing the run open before this chunk
+        run_sec = np.bincount(run_ids[is_high], weights=duration[is_high], minlength=run_ids[-1] + 1)
+        if is_high[0] and not starts[0]:
+            run_sec[0] += self._run_sec
+        if len(run_sec):
+            self.longest_high_risk_sec = max(self.longest_high_risk_sec, float(run_sec.max()))
+        
+        self._run_sec = float(run_sec[run_ids[-1]]) if is_high[-1] else 0.0
+        self._last_time = float(time_sec[-1])
+        self._last_high = bool(is_high[-1])
+    
+    @property
+    def mean_score(self):
+        return self.score_sum / self.count if self.count else None
+    
+    def flag_frequency(self, name):
+        return self.flag_counts[name] / self.count if self.count else 0.0
+    
+    def summary(self):
+        mean = self.mean_score
+        return {
+            'frames': self.count,
+            'seconds': round(self.seconds, 3),
+            'avg_score': mean,
+            'max_score': self.score_max,
+            'min_score': self.score_min,
+            'risk_level': get_risk_level(mean) if mean is not None else None,
+            'score_histogram': {score: int(self.histogram[score]) for score in range(1, 8)},
+            'risk_level_seconds': {level: round(float(self.risk_seconds[level]), 3) for level in range(1, 5)},
+            'longest_high_risk_sec': round(self.longest_high_risk_sec, 3),
+            'flag_frequency': {name: self.flag_frequency(name) for name in self.flag_counts},
+        }
 
 
-def create_score_timeline_comparison(df, lang='en'):
-    """Create interactive timeline plot comparing original and adjusted scores"""
-    fig = go.Figure()
+def resolve_frame_stride(fps, frame_stride=1, analysis_fps=None):
+    """Number of frames per pose inference, from a stride or a target analysis rate in Hz"""
+    if analysis_fps:
+        return max(1, int(round(fps / analysis_fps)))
+    return max(1, int(frame_stride))
+
+
+def fill_skipped_frames(sample_frames, sample_landmarks, total_frames, frame_stride):
+    """Fill frames skipped between pose inferences
     
-    # Original scores
-    fig.add_trace(go.Scatter(
-        x=df['time_sec'],
-        y=df['rula_score'],
-        mode='lines+markers',
-        name='Original RULA' if lang == 'en' else 'RULA Asli',
-        line=dict(color='rgb(0, 123, 255)', width=2, dash='dash'),
-        marker=dict(size=4),
-        opacity=0.6
-    ))
+    `sample_landmarks` holds one (33, 4) row per inferred frame, NaN where no pose
+    was detected. Skipped frames are linearly interpolated between the surrounding
+    inferred frames (held after the last one) and dropped if either has no pose.
+    Returns (frames, landmarks, measured) for every frame with landmarks.
+    """
+    sample_frames = np.asarray(sample_frames)
+    if len(sample_frames) == 0:
+        return sample_frames, np.empty((0, 33, 4), dtype=np.float32), np.empty(0, dtype=bool)
     
-    # Adjusted scores
-    fig.add_trace(go.Scatter(
-        x=df['time_sec'],
-        y=df['adjusted_rula_score'],
-        mode='lines+markers',
-        name='Adjusted RULA' if lang == 'en' else 'RULA Disesuaikan',
-        line=dict(color='rgb(255, 0, 0)', width=2),
-        marker=dict(size=6)
-    ))
+    frames = np.arange(sample_frames[0], max(total_frames, sample_frames[-1]) + 1)
+    offset = frames - sample_frames[0]
     
-    # Add risk level zones
-    fig.add_hrect(y0=0, y1=2, fillcolor="green", opacity=0.1, line_width=0)
-    fig.add_hrect(y0=2, y1=3, fillcolor="yellow", opacity=0.1, line_width=0)
-    fig.add_hrect(y0=3, y1=5, fillcolor="orange", opacity=0.1, line_width=0)
-    fig.add_hrect(y0=5, y1=7, fillcolor="red", opacity=0.1, line_width=0)
+    previous = np.minimum(offset // frame_stride, len(sample_frames) - 1)
+    following = np.minimum(previous + 1, len(sample_frames) - 1)
+    weight = (offset - previous * frame_stride) / frame_stride
+    weight[previous == following] = 0  # hold after the last inferred frame
     
-    fig.update_layout(
-        title='RULA Score Comparison' if lang == 'en' else 'Perbandingan Skor RULA',
-        xaxis_title='Time (seconds)' if lang == 'en' else 'Waktu (detik)',
-        yaxis_title='RULA Score' if lang == 'en' else 'Skor RULA',
-        yaxis=dict(range=[0, 7.5], dtick=1),
-        hovermode='x unified',
-        height=400,
-        showlegend=True
+    measured = frames == sample_frames[previous]
+    weight = weight[:, None, None].astype(np.float32)
+    landmarks = np.where(
+        weight == 0,
+        sample_landmarks[previous],
+        sample_landmarks[previous] * (1 - weight) + sample_landmarks[following] * weight
     )
     
-    return fig
+    has_pose = ~np.isnan(landmarks).any(axis=(1, 2))
+    return frames[has_pose], landmarks[has_pose], measured[has_pose]
 
 
-def get_risk_level(score):
-    """Determine risk level from RULA score"""
-    if score <= 2:
-        return 1
-    elif score <= 4:
-        return 2
-    elif score <= 6:
-        return 3
-    else:
-        return 4
+# Frames buffered between pipeline stages; bounds memory regardless of video length
+PIPELINE_QUEUE_SIZE = 8
 
+# Marks the end of the frame stream on a pipeline queue
+_END_OF_STREAM = object()
 
-def main():
-    # Language selector in sidebar
-    lang = st.sidebar.selectbox(
-        TRANSLATIONS['en']['lang_label'],
-        options=['en', 'id'],
-        format_func=lambda x: 'English' if x == 'en' else 'Bahasa Indonesia'
-    )
+
+def _queue_put(q, item, stop_event):
+    """Put an item on a bounded pipeline queue; returns False if the pipeline is stopping"""
+    while not stop_event.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _queue_get(q, stop_event):
+    """Get the next item from a pipeline queue, or end-of-stream if the pipeline is stopping"""
+    while not stop_event.is_set():
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            continue
+    return _END_OF_STREAM
+
+
+class _PipelineWorker(threading.Thread):
+    """Thread running one pipeline stage; an error stops the whole pipeline"""
     
-    t = TRANSLATIONS[lang]
+    def __init__(self, stage, stop_event, name):
+        super().__init__(name=name, daemon=True)
+        self.stage = stage
+        self.stop_event = stop_event
+        self.error = None
     
-    # Title
-    st.title(t['title'])
-    st.markdown(f"**{t['subtitle']}**")
+    def run(self):
+        try:
+            self.stage()
+        except BaseException as e:
+            self.error = e
+            self.stop_event.set()
+
+
+# Motion gate: frames are compared as grayscale thumbnails this many pixels wide, and a
+# thumbnail pixel counts as changed when it differs by more than this many grey levels
+MOTION_GATE_WIDTH = 64
+MOTION_PIXEL_DELTA = 12
+
+# Longest stretch (seconds of video) a pose is reused before inference is forced
+MOTION_MAX_REUSE_SEC = 2.0
+
+
+class MotionGate:
+    """Frame-difference gate deciding which frames need pose inference
     
-    # File upload
-    uploaded_file = st.file_uploader(
-        t['upload_label'],
-        type=['mp4', 'avi', 'mov', 'mkv'],
-        help=t['upload_help']
-    )
+    Each frame is shrunk to a grayscale thumbnail and compared with the thumbnail
+    of the last frame that was inferred. If at most `threshold` percent of the
+    thumbnail pixels changed by more than `pixel_delta` grey levels, the frame
+    counts as unchanged and reuses the last pose, for at most `max_reuse` frames
+    in a row. Counting changed pixels rather than averaging the difference keeps
+    a moving forearm from being lost in a static background, and comparing
+    against the last inferred frame lets slow drift add up until it is detected.
     
-    if uploaded_file is not None:
-        # Save uploaded file temporarily
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.mp4') as tmp_file:
-            tmp_file.write(uploaded_file.read())
-            video_path = tmp_file.name
+    Frames before `start_frame` are always inferred, e.g. so pose tracking settles.
+    """
+    
+    def __init__(self, threshold, max_reuse, width=MOTION_GATE_WIDTH, pixel_delta=MOTION_PIXEL_DELTA, start_frame=1):
+        self.threshold = threshold
+        self.max_reuse = max_reuse
+        self.width = width
+        self.pixel_delta = pixel_delta
+        self.start_frame = start_frame
+        self.reference = None
+        self.reused = 0
+    
+    def should_infer(self, frame_number, frame):
+        """Whether `frame` (BGR) changed enough to need pose inference"""
+        height, width = frame.shape[:2]
+        size = (self.width, max(1, int(round(height * self.width / width))))
+        thumbnail = cv2.cvtColor(cv2.resize(frame, size, interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
         
-        # Process button
-        if st.button('🚀 ' + ('Analyze Video' if lang == 'en' else 'Analisis Video'), type='primary'):
-            with st.spinner(t['processing']):
-                progress_bar = st.progress(0)
-                
-                try:
-                    # Process video
-                    output_video_path, results_df = process_video(video_path, progress_bar)
-                    
-                    if len(results_df) == 0:
-                        st.error(t['error_no_pose'])
-                    else:
-                        st.success(t['analysis_complete'])
-                        
+        if self.reference is not None and self.reused < self.max_reuse and frame_number >= self.start_frame:
+            changed = np.count_nonzero(cv2.absdiff(thumbnail, self.reference) > self.pixel_delta)
+            if changed * 100 <= self.threshold * thumbnail.size:
+                self.reused += 1
+                return False
+        
+        self.reference = thumbnail
+        self.reused = 0
+        return True
+
+
+def create_motion_gate(fps, frame_stride=1, motion_threshold=None, motion_max_reuse_sec=MOTION_MAX_REUSE_SEC,
+                       start_frame=1):
+    """MotionGate for a video's decoded frames, or None when `motion_threshold` is unset or 0"""
+    if not motion_threshold:
+        return None
+    max_reuse = max(1, int(round(motion_max_reuse_sec * fps / frame_stride)))
+    return MotionGate(motion_threshold, max_reuse, start_frame=start_frame)
+
+
+def prepare_inference_image(frame, inference_width=None):
+    """Downscale a BGR frame to at most `inference_width` pixels wide and convert it to RGB
+    
+    MediaPipe landmarks are normalized to the image size, so they map straight back
+    onto the original frame as long as the aspect ratio is kept.
+    """
+    height, width = frame.shape[:2]
+    if inference_width and width > inference_width:
+        size = (int(inference_width), max(1, int(round(height * inference_width / width))))
+        frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+    
+    image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    image.flags.writeable = False
+    return image
+
+
+def create_pose(model_complexity=1, min_detection_confidence=0.5, min_tracking_confidence=0.5):
+    """Create the MediaPipe Pose model used for video analysis"""
+    return mp.solutions.pose.Pose(
+        static_image_mode=False,
+        model_complexity=model_complexity,
+        min_detection_confidence=min_detection_confidence,
+        min_tracking_confidence=min_tracking_confidence
+    )
+
+
+class SharedPose:
+    """A warmed-up Pose model shared by all sessions of this process; hold `lock` while using it"""
+    
+    def __init__(self, **pose_options):
+        self.pose = create_pose(**pose_options)
+        self.lock = threading.Lock()
+        
+        # The first process() call initialises the graph; do it now rather than on the first video
+        self.pose.process(np.zeros((256, 256, 3), dtype=np.uint8))
+        self.pose.reset()
+
+
+@st.cache_resource(show_spinner=False)
+def get_shared_pose(model_complexity=1, min_detection_confidence=0.5, min_tracking_confidence=0.5):
+    """The process-wide SharedPose for these options, created once"""
+    return SharedPose(
+        model_complexity=model_complexity,
+        min_detection_confidence=min_detection_confidence,
+        min_tracking_confidence=min_tracking_confidence
+    )
+
+
+@contextmanager
+def pose_session(**pose_options):
+    """Borrow the shared Pose model, reset for a new video
+    
+    Tracking state is per video, so the model is reset before use and held under
+    its lock. While another session is using it, a private model is created instead
+    of waiting.
+    """
+    shared = get_shared_pose(**pose_options)
+    if not shared.lock.acquire(blocking=False):
+        with create_pose(**pose_options) as pose:
+            yield pose
+        return
+    
+    try:
+        shared.pose.reset()
+        yield shared.pose
+    finally:
+        shared.lock.release()
+
+
+# Relative inference cost of the Pose models (lite, full, heavy), used to predict the
+# speed of a model before it has run
+POSE_MODEL_COST = {0: 0.6, 1: 1.0, 2: 2.8}
+
+# Inferred frames per throughput measurement of AdaptivePose
+ADAPTIVE_WINDOW_FRAMES = 30
+
+# Predicted margin over the target rate required before moving to a heavier model
+ADAPTIVE_HEADROOM = 1.2
+
+
+class AdaptivePose:
+    """Pose models of complexity 0-2, switched to keep up with a target analysis rate
+    
+    The target is `min_fps` video frames per second, or the rate needed to reach
+    frame `total_frames` within `time_budget_sec`, whichever is higher. Every
+    `window` inferred frames the throughput is split into model time per inference
+    and the remaining time per video frame (decoding, skipped frames), and the
+    heaviest model predicted to meet the target is used from then on. Without a
+    target the starting model is kept.
+    
+    `pose` is the starting model, of `pose_options['model_complexity']`, and is not
+    closed here; the others are created when first needed and closed on exit. A
+    model that cannot be created (e.g. its weights cannot be downloaded) is skipped.
+    """
+    
+    def __init__(self, pose, pose_options=None, total_frames=0, time_budget_sec=None, min_fps=None, first_frame=1,
+                 window=ADAPTIVE_WINDOW_FRAMES):
+        self.pose_options = dict(pose_options or {})
+        self.model_complexity = self.pose_options.pop('model_complexity', 1)
+        self.total_frames = total_frames
+        self.min_fps = min_fps
+        self.window = window
+        self.switches = []  # (frame number, model complexity) of every change
+        self._poses = {self.model_complexity: pose}
+        self._created = []
+        self._unavailable = set()
+        self._pose_sec = {level: collections.deque(maxlen=window) for level in POSE_MODEL_COST}
+        
+        started = time.perf_counter()
+        self._deadline = started + time_budget_sec if time_budget_sec else None
+        self._window_start = (started, first_frame - 1)
+        self._window_pose_sec = 0.0
+        self._window_inferred = 0
+    
+    @property
+    def adaptive(self):
+        return bool(self.min_fps or self._deadline)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        for pose in self._created:
+            pose.close()
+    
+    def process(self, image):
+        started = time.perf_counter()
+        results = self._poses[self.model_complexity].process(image)
+        elapsed = time.perf_counter() - started
+        self._pose_sec[self.model_complexity].append(elapsed)
+        self._window_pose_sec += elapsed
+        self._window_inferred += 1
+        return results
+    
+    def step(self, frame_number):
+        """Account for the frames up to `frame_number`; may switch the model at the end of a window"""
+        if not self.adaptive or self._window_inferred < self.window:
+            return
+        
+        now = time.perf_counter()
+        window_started, window_frame = self._window_start
+        frames = max(frame_number - window_frame, 1)
+        overhead = max(now - window_started - self._window_pose_sec, 0.0) / frames
+        inference_rate = self._window_inferred / frames
+        self._window_start = (now, frame_number)
+        self._window_pose_sec = 0.0
+        self._window_inferred = 0
+        
+        level = self._choose(self.target_fps(frame_number, now), overhead, inference_rate)
+        if level != self.model_complexity:
+            self._switch(frame_number, level)
+    
+    def target_fps(self, frame_number, now=None):
+        """Video frames per second needed from here on"""
+        target = self.min_fps or 0.0
+        if self._deadline is not None:
+            remaining_sec = self._deadline - (now or time.perf_counter())
+            remaining_frames = max(self.total_frames - frame_number, 0)
+            target = max(target, remaining_frames / remaining_sec if remaining_sec > 0 else float('inf'))
+        return target
+    
+    def predicted_fps(self, level, overhead, inference_rate):
+        """Video frames per second with model `level`, from the last window's overhead and inference rate"""
+        frame_sec = overhead + inference_rate * self._cost(level)
+        return 1.0 / frame_sec if frame_sec > 0 else float('inf')
+    
+    def _cost(self, level):
+        """Median inference time of `level`, estimated from the current model's if it has not run yet"""
+        if self._pose_sec[level]:
+            return float(np.median(self._pose_sec[level]))
+        current = float(np.median(self._pose_sec[self.model_complexity]))
+        return current * POSE_MODEL_COST[level] / POSE_MODEL_COST[self.model_complexity]
+    
+    def _choose(self, target, overhead, inference_rate):
+        levels = [level for level in sorted(POSE_MODEL_COST) if level not in self._unavailable]
+        for level in reversed(levels):
+            margin = ADAPTIVE_HEADROOM if level > self.model_complexity else 1.0
+            if self.predicted_fps(level, overhead, inference_rate) >= target * margin:
+                return level
+        return levels[0]
+    
+    def _switch(self, frame_number, level):
+        if level in self._poses:
+            self._poses[level].reset()  # Tracking state is stale since it last ran
+        else:
+            try:
+                self._poses[level] = create_pose(model_complexity=level, **self.pose_options)
+            except Exception:
+                self._unavailable.add(level)
+                return
+            self._created.append(self._poses[level])
+        self.model_complexity = level
+        self.switches.append((frame_number, level))
+
+
+def array_to_landmark_list(landmarks):
+    """Convert a (33, 4) landmark array back to a MediaPipe landmark list for drawing"""
+    landmark_list = landmark_pb2.NormalizedLandmarkList()
+    for x, y, z, visibility in landmarks.tolist():
+        landmark_list.landmark.add(x=x, y=y, z=z, visibility=visibility)
+    return landmark_list
+
+
+def draw_pose_landmarks(image, pose_landmarks):
+    """Draw pose landmarks (MediaPipe landmark list or (33, 4) array) onto a BGR image"""
+    mp_pose = mp.solutions.pose
+    mp_drawing = mp.solutions.drawing_utils
+    
+    if isinstance(pose_landmarks, np.ndarray):
+        pose_landmarks = array_to_landmark_list(pose_landmarks)
+    
+    mp_drawing.draw_landmarks(
+        image,
+        pose_landmarks,
+        mp_pose.POSE_CONNECTIONS,
+        mp_drawing.DrawingSpec(color=(245, 117, 66), thickness=2, circle_radius=2),
+        mp_drawing.DrawingSpec(color=(245, 66, 230), thickness=2, circle_radius=2)
+    )
+
+
+def open_video(video_path):
+    """Open a video; returns (capture, fps, width, height, frame count)"""
+    cap = cv2.VideoCapture(video_path)
+    fps = int(cap.get(cv2.CAP_PROP_FPS))
+    fps = max(fps, 15)  # Ensure minimum fps
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    return cap, fps, width, height, total_frames
+
+
+# Annotated video codecs: (fourcc, container suffix)
+VIDEO_CODECS = {
+    'h264': ('avc1', '.mp4'),
+    'vp8': ('VP80', '.webm'),
+    'mp4v': ('mp4v', '.mp4'),
+    'mjpg': ('MJPG', '.avi'),
+}
+VIDEO_MIME_TYPES = {'.mp4': 'video/mp4', '.webm': 'video/webm', '.avi': 'video/x-msvideo'}
+
+# Annotated video output profiles: codecs tried in order (MJPEG is the last resort),
+# output scale, fps divisor (write every n-th rendered frame) and MJPEG JPEG quality
+VIDEO_PROFILES = {
+    'preview': {'codecs': ['h264', 'vp8'], 'scale': 0.5, 'fps_divisor': 2, 'quality': 60},
+    'standard': {'codecs': ['h264', 'vp8', 'mp4v'], 'scale': 1.0, 'fps_divisor': 1, 'quality': 80},
+    'full': {'codecs': ['mjpg'], 'scale': 1.0, 'fps_divisor': 1, 'quality': None},
+}
+DEFAULT_VIDEO_PROFILE = 'full'
+
+
+def create_video_writer(fps, width, height, codecs=('mjpg',), quality=None):
+    """Open a temp file with the first codec this OpenCV build can encode; returns (path, writer)
+    
+    Falls back to MJPEG AVI, which always works. With a `quality` (0-100), MJPEG is
+    written by OpenCV's built-in MJPEG encoder, as the FFmpeg backend ignores the
+    JPEG quality setting.
+    """
+    for codec in list(dict.fromkeys([*codecs, 'mjpg'])):
+        fourcc, suffix = VIDEO_CODECS[codec]
+        output_path = tempfile.NamedTemporaryFile(delete=False, suffix=suffix).name
+        if codec == 'mjpg' and quality is not None:
+            out = cv2.VideoWriter(
+                output_path, cv2.CAP_OPENCV_MJPEG, cv2.VideoWriter_fourcc(*fourcc), fps, (width, height)
+            )
+        else:
+            out = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*fourcc), fps, (width, height))
+        
+        if out.isOpened():
+            if quality is not None:
+                out.set(cv2.VIDEOWRITER_PROP_QUALITY, quality)
+            return output_path, out
+        out.release()
+        os.unlink(output_path)
+    
+    raise Exception("Could not create video output")
+
+
+class StageTimer:
+    """Per-stage wall-clock timings of the video pipeline
+    
+    Each stage keeps one duration per call: 'grab', 'decode' and 'prepare' on the
+    decoder thread, 'pose' for inference, 'draw' and 'write' when rendering, and
+    'frame_latency' from the start of decoding a frame to the end of its last
+    stage. Batched steps ('interpolate', 'scoring') record one duration per run.
+    """
+    
+    PERCENTILES = (50, 90, 99)
+    
+    def __init__(self):
+        self.samples = {}
+    
+    def record(self, stage, seconds):
+        self.samples.setdefault(stage, []).append(seconds)
+    
+    @contextmanager
+    def measure(self, stage):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - started)
+    
+    def merge(self, samples):
+        """Add the raw samples of another timer, e.g. from a worker process"""
+        for stage, values in samples.items():
+            self.samples.setdefault(stage, []).extend(values)
+    
+    def summary(self):
+        """Count, cumulative seconds and mean/percentile/max milliseconds per stage"""
+        summary = {}
+        for stage, values in self.samples.items():
+            ms = np.asarray(values, dtype=np.float64) * 1000
+            summary[stage] = {
+                'count': len(values),
+                'total_sec': round(float(ms.sum()) / 1000, 4),
+                'mean_ms': round(float(ms.mean()), 3),
+                **{f"p{p}_ms": round(float(np.percentile(ms, p)), 3) for p in self.PERCENTILES},
+                'max_ms': round(float(ms.max()), 3),
+            }
+        return summary
+    
+    def to_json(self):
+        return json.dumps(self.summary(), indent=2)
+
+
+def run_frame_pipeline(cap, process_frame, out=None, frame_stride=1, inference_width=None,
+                       first_frame=1, last_frame=None, prepare=True, timer=None, output_size=None, gate=None):
+    """Run decode -> process_frame -> draw -> encode as pipelined stages
+    
+    A decoder thread reads frames `first_frame`..`last_frame` (1-based, `cap` already
+    positioned at `first_frame`), decoding every `frame_stride`-th frame counted from
+    frame 1 and skipping the rest with cap.grab(). `process_frame(frame_number, frame,
+    image)` runs in frame order on the calling thread and returns the pose landmarks
+    to draw, or None; `image` is the RGB inference image when `prepare` is set. With a
+    VideoWriter `out`, drawing and encoding run on their own worker threads, frames
+    being resized to `output_size` (width, height) first if given.
+    
+    With a MotionGate `gate`, decoded frames it finds unchanged are not prepared and
+    reach process_frame with `image` None: the previous frame's result is to be
+    reused.
+    
+    Stage durations are recorded in `timer` (a StageTimer), if given.
+    
+    Returns the number of the last frame read.
+    """
+    timer = timer or StageTimer()
+    stop_event = threading.Event()
+    decoded = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    to_draw = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    to_encode = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    frame_number = first_frame - 1
+    
+    def decode_frames():
+        nonlocal frame_number
+        while cap.isOpened() and (last_frame is None or frame_number < last_frame):
+            started = time.perf_counter()
+            if frame_number % frame_stride:
+                # Skipped frame: advance without decoding
+                if not cap.grab():
+                    break
+                frame_number += 1
+                timer.record('grab', time.perf_counter() - started)
+                continue
+            
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frame_number += 1
+            decoded_at = time.perf_counter()
+            timer.record('decode', decoded_at - started)
+            
+            changed = True
+            if gate is not None:
+                with timer.measure('motion_gate'):
+                    changed = gate.should_infer(frame_number, frame)
+            
+            # Downscale and convert to RGB here so inference only runs the model
+            image = None
+            if prepare and changed:
+                prepare_started = time.perf_counter()
+                image = prepare_inference_image(frame, inference_width)
+                timer.record('prepare', time.perf_counter() - prepare_started)
+            if not _queue_put(decoded, (frame_number, frame, image, started), stop_event):
+                return
+        _queue_put(decoded, _END_OF_STREAM, stop_event)
+    
+    def draw_overlays():
+        while True:
+            item = _queue_get(to_draw, stop_event)
+            if item is _END_OF_STREAM:
+                break
+            image, pose_landmarks, started = item
+            
+            if output_size is not None:
+                image = cv2.resize(image, output_size, interpolation=cv2.INTER_AREA)
+            
+            if pose_landmarks is not None:
+                # Draw pose landmarks on the original BGR frame
+                with timer.measure('draw'):
+                    draw_pose_landmarks(image, pose_landmarks)
+            
+            if not _queue_put(to_encode, (image, started), stop_event):
+                return
+        _queue_put(to_encode, _END_OF_STREAM, stop_event)
+    
+    def encode_frames():
+        while True:
+            item = _queue_get(to_encode, stop_event)
+            if item is _END_OF_STREAM:
+                break
+            image, started = item
+            
+            write_started = time.perf_counter()
+            out.write(image)
+            written_at = time.perf_counter()
+            timer.record('write', written_at - write_started)
+            timer.record('frame_latency', written_at - started)
+    
+    workers = [_PipelineWorker(decode_frames, stop_event, 'selarassehat-decode')]
+    if out is not None:
+        workers.append(_PipelineWorker(draw_overlays, stop_event, 'selarassehat-draw'))
+        workers.append(_PipelineWorker(encode_frames, stop_event, 'selarassehat-encode'))
+    
+    try:
+        for worker in workers:
+            worker.start()
+        
+        while True:
+            item = _queue_get(decoded, stop_event)
+            if item is _END_OF_STREAM:
+                break
+            number, frame, image, started = item
+            
+            pose_landmarks = process_frame(number, frame, image)
+            
+            if out is None:
+                timer.record('frame_latency', time.perf_counter() - started)
+            elif not _queue_put(to_draw, (frame, pose_landmarks, started), stop_event):
+                break
+        
+        if out is not None:
+            _queue_put(to_draw, _END_OF_STREAM, stop_event)
+    except BaseException:
+        stop_event.set()
+        raise
+    finally:
+        for worker in workers:
+            if worker.ident is not None:
+                worker.join()
+    
+    for worker in workers:
+        if worker.error is not None:
+            raise worker.error
+    
+    return frame_number
+
+
+PROGRESS_TEXT = '{frames_done}/{total_frames} frames, {fps:.1f} fps, pose {pose_rate:.0%}, ETA {eta}'
+
+
+class ProgressReporter:
+    """Rate-limited progress and telemetry of a video analysis
+    
+    update() is cheap enough to call for every frame; `callback` receives the
+    stats() dict at most `max_updates_per_sec` times a second, and once more from
+    finish(). Use streamlit_progress() or log_progress() for ready-made callbacks.
+    """
+    
+    def __init__(self, callback, max_updates_per_sec=4):
+        self.callback = callback
+        self.min_interval = 1.0 / max_updates_per_sec if max_updates_per_sec else 0.0
+        self.start()
+    
+    def start(self, total_frames=0):
+        self.total_frames = total_frames
+        self.frames_done = 0
+        self.frames_inferred = 0
+        self.poses_detected = 0
+        self.finished = False
+        self.started = time.perf_counter()
+        self._last_report = float('-inf')
+    
+    def update(self, frames_done, frames_inferred=None, poses_detected=None):
+        """Record progress; reports only if the last report is older than the rate limit"""
+        self.frames_done = frames_done
+        if frames_inferred is not None:
+            self.frames_inferred = frames_inferred
+        if poses_detected is not None:
+            self.poses_detected = poses_detected
+        
+        now = time.perf_counter()
+        if now - self._last_report >= self.min_interval:
+            self._last_report = now
+            self.callback(self.stats(now))
+    
+    def finish(self, frames_done=None, frames_inferred=None, poses_detected=None):
+        """Always report the final state"""
+        if frames_done is not None:
+            self.frames_done = frames_done
+        if frames_inferred is not None:
+            self.frames_inferred = frames_inferred
+        if poses_detected is not None:
+            self.poses_detected = poses_detected
+        self.total_frames = max(self.total_frames, self.frames_done)
+        self.finished = True
+        self._last_report = time.perf_counter()
+        self.callback(self.stats(self._last_report))
+    
+    def stats(self, now=None):
+        elapsed = (now or time.perf_counter()) - self.started
+        fps = self.frames_done / elapsed if elapsed > 0 else 0.0
+        if self.finished:
+            fraction = 1.0
+        else:
+            fraction = min(self.frames_done / self.total_frames, 1.0) if self.total_frames else 0.0
+        return {
+            'frames_done': self.frames_done,
+            'total_frames': self.total_frames,
+            'fraction': fraction,
+            'fps': fps,
+            'pose_rate': self.poses_detected / self.frames_inferred if self.frames_inferred else 0.0,
+            'elapsed_sec': elapsed,
+            'eta_sec': max(self.total_frames - self.frames_done, 0) / fps if fps > 0 else None,
+        }
+
+
+def as_progress_reporter(progress):
+    """Accept a ProgressReporter, a plain callback taking the stats dict, or None"""
+    if progress is None or isinstance(progress, ProgressReporter):
+        return progress
+    return ProgressReporter(progress)
+
+
+def format_progress(stats, template=PROGRESS_TEXT):
+    """Format a stats dict with `template`; {eta} is the remaining time as m:ss"""
+    eta = stats['eta_sec']
+    eta_text = '--:--' if eta is None else f"{int(eta) // 60}:{int(eta) % 60:02d}"
+    return template.format(eta=eta_text, **stats)
+
+
+def streamlit_progress(progress_bar, template=PROGRESS_TEXT):
+    """Progress callback updating a Streamlit progress bar and its text"""
+    def callback(stats):
+        progress_bar.progress(stats['fraction'], text=format_progress(stats, template))
+    return callback
+
+
+def log_progress(prefix='', stream=None):
+    """Progress callback printing one line per report, for headless use"""
+    def callback(stats):
+        print(prefix + format_progress(stats), file=stream or sys.stderr, flush=True)
+    return callback
+
+
+# Frames analysed and discarded before each segment's start so tracking settles near the boundary
+SEGMENT_WARMUP_FRAMES = 30
+
+# Seconds between polls of the segment workers' progress counters
+SEGMENT_PROGRESS_POLL_SEC = 0.25
+
+# In segment worker processes: shared int64 (frames done, frames inferred, poses detected) per segment
+_segment_progress = None
+
+
+def _init_segment_worker(progress_counters):
+    """Process pool initializer handing the shared progress counters to a segment worker"""
+    global _segment_progress
+    _segment_progress = progress_counters
+
+
+def _analyze_segment(video_path, first_frame, last_frame, frame_stride=1, inference_width=None, pose_options=None,
+                     gate_options=None, adaptive_options=None, checkpoint=None, progress_slot=None):
+    """Detect pose landmarks on frames first_frame..last_frame in a worker process
+    
+    Seeks `SEGMENT_WARMUP_FRAMES` before the segment and discards those results so
+    pose tracking has mostly settled at the boundary. Returns (sample columns as in
+    LANDMARK_DTYPES, with NaN landmarks where no pose, number of the last frame
+    read, raw StageTimer samples).
+    
+    With an AnalysisCheckpoint `checkpoint`, progress is saved periodically and on
+    completion, and a checkpointed segment resumes after its last saved frame.
+    
+    With `progress_slot`, the segment's frames done, frames inferred and poses
+    detected are kept up to date in that row of the pool's shared counters.
+    """
+    timer = StageTimer()
+    samples = ColumnStore(LANDMARK_DTYPES, capacity=256, shapes=LANDMARK_SHAPES)
+    counters = np.zeros(3, dtype=np.int64)
+    if progress_slot is not None and _segment_progress is not None:
+        counters = np.frombuffer(_segment_progress, dtype=np.int64).reshape(-1, 3)[progress_slot]
+    
+    segment_first = first_frame
+    if checkpoint is not None:
+        resumed_frame, finished = checkpoint.restore(samples)
+        inferred = ~samples.columns()['reused']
+        counters[:] = (
+            max(resumed_frame - segment_first + 1, 0), inferred.sum(),
+            (~np.isnan(samples.columns()['landmarks'][inferred, 0, 0])).sum()
+        )
+        if finished:
+            return samples.compact().columns(), resumed_frame, timer.samples
+        first_frame = max(first_frame, resumed_frame + 1)
+    
+    cap, fps, _, _, total_frames = open_video(video_path)
+    start = max(1, first_frame - SEGMENT_WARMUP_FRAMES)
+    cap.set(cv2.CAP_PROP_POS_FRAMES, start - 1)
+    gate = create_motion_gate(fps, frame_stride, **(gate_options or {}), start_frame=first_frame)
+    
+    landmarks = np.nan
+    landmarks_model = None
+    
+    def analyze_frame(frame_number, frame, image):
+        nonlocal landmarks, landmarks_model
+        if image is not None:
+            landmarks_model = pose.model_complexity
+            with timer.measure('pose'):
+                results = pose.process(image)
+            landmarks = landmarks_to_array(results.pose_landmarks.landmark) if results.pose_landmarks else np.nan
+        if frame_number >= first_frame:
+            samples.append(
+                frame=frame_number, landmarks=landmarks, reused=image is None, model_complexity=landmarks_model
+            )
+            if checkpoint is not None:
+                checkpoint.update(samples, frame_number)
+            counters[0] = frame_number - segment_first + 1
+            if image is not None:
+                counters[1] += 1
+                counters[2] += results.pose_landmarks is not None
+        pose.step(frame_number)
+        return None
+    
+    pose_options = pose_options or {}
+    try:
+        with create_pose(**pose_options) as model, AdaptivePose(
+            model, pose_options, last_frame or total_frames, first_frame=start, **(adaptive_options or {})
+        ) as pose:
+            frame_count = run_frame_pipeline(
+                cap, analyze_frame,
+                frame_stride=frame_stride,
+                inference_width=inference_width,
+                first_frame=start,
+                last_frame=last_frame,
+                timer=timer,
+                gate=gate
+            )
+    finally:
+        cap.release()
+    
+    if checkpoint is not None:
+        checkpoint.save(samples, frame_count, finished=True)
+    return samples.compact().columns(), frame_count, timer.samples
+
+
+def _segment_bounds(total_frames, workers):
+    """(first, last) frame of each of up to `workers` time segments; the last one reads to the end (None)"""
+    bounds = np.linspace(0, total_frames, workers + 1).astype(int)
+    segments = [(int(bounds[i]) + 1, int(bounds[i + 1])) for i in range(workers) if bounds[i + 1] > bounds[i]]
+    segments[-1] = (segments[-1][0], None)
+    return segments
+
+
+def _analyze_segments_parallel(video_path, total_frames, workers, frame_stride=1, inference_width=None,
+                               pose_options=None, progress=None, timer=None, gate_options=None, adaptive_options=None,
+                               cache_key=None, checkpoint_sec=None):
+    """Split the video into `workers` time segments analysed by separate processes
+    
+    Each process runs its own Pose model. Segment results are stitched back in frame
+    order; the last segment reads to the end of the video in case the frame count
+    reported by the container is short. The workers' stage timings are merged into
+    `timer`, so stage totals add up time across processes.
+    
+    Results are close to, but not identical with, a serial run: each segment starts
+    a fresh tracker, and the discarded warm-up does not fully reproduce the tracking
+    and landmark smoothing state of the frames before it. Landmarks differ slightly
+    from the first segment boundary on, so scores near a threshold can change on
+    individual frames. Use a single worker when results must match exactly.
+    
+    With `adaptive_options`, each process adapts its model to the whole time budget
+    and its share of the minimum rate, as the segments run side by side.
+    
+    With a landmark `cache_key` and `checkpoint_sec`, each segment checkpoints its
+    progress separately and resumes from it (see AnalysisCheckpoint).
+    
+    Workers count their progress in shared memory, polled every
+    SEGMENT_PROGRESS_POLL_SEC to update `progress` while the segments run.
+    """
+    segments = _segment_bounds(total_frames, workers)
+    
+    adaptive_options = dict(adaptive_options or {})
+    if adaptive_options.get('min_fps'):
+        adaptive_options['min_fps'] /= len(segments)
+    
+    # Spawn fresh interpreters: forking a process that already ran MediaPipe is not safe
+    context = multiprocessing.get_context('spawn')
+    counters = context.RawArray('q', 3 * len(segments))
+    with ProcessPoolExecutor(
+        max_workers=len(segments), mp_context=context, initializer=_init_segment_worker, initargs=(counters,)
+    ) as executor:
+        futures = [
+            executor.submit(
+                _analyze_segment, video_path, first, last, frame_stride, inference_width, pose_options, gate_options,
+                adaptive_options,
+                AnalysisCheckpoint(checkpoint_key(cache_key, first, last), checkpoint_sec)
+                if cache_key and checkpoint_sec else None,
+                slot
+            )
+            for slot, (first, last) in enumerate(segments)
+        ]
+        pending = set(futures)
+        while pending:
+            _, pending = wait(pending, timeout=SEGMENT_PROGRESS_POLL_SEC)
+            if progress:
+                frames_done, frames_inferred, poses_detected = np.frombuffer(counters, dtype=np.int64).reshape(
+                    -1, 3
+                ).sum(axis=0).tolist()
+                progress.update(frames_done, frames_inferred, poses_detected)
+        results = [future.result() for future in futures]
+    
+    if timer is not None:
+        for result in results:
+            timer.merge(result[2])
+    
+    samples = {name: np.concatenate([result[0][name] for result in results]) for name in LANDMARK_DTYPES}
+    return samples, results[-1][1]
+
+
+def render_annotated_video(video_path, sample_frames, sample_landmarks, frame_stride=1, timer=None,
+                           profile=DEFAULT_VIDEO_PROFILE, last_frame=None):
+    """Render the annotated video from the stored landmarks of the inferred frames
+    
+    `profile` names a VIDEO_PROFILES entry; the output keeps every `fps_divisor`-th
+    inferred frame, so the sampled landmarks cover all written frames. With
+    `last_frame`, rendering stops there, e.g. at the end of a partial analysis.
+    """
+    settings = VIDEO_PROFILES[profile]
+    cap, fps, width, height, _ = open_video(video_path)
+    output_stride = frame_stride * settings['fps_divisor']
+    
+    output_size = None
+    if settings['scale'] != 1:
+        # Even dimensions, as most codecs require
+        width = max(2, int(width * settings['scale']) // 2 * 2)
+        height = max(2, int(height * settings['scale']) // 2 * 2)
+        output_size = (width, height)
+    
+    try:
+        output_path, out = create_video_writer(
+            fps / output_stride, width, height, settings['codecs'], settings['quality']
+        )
+    except Exception:
+        cap.release()
+        raise
+    
+    rows = {frame_number: i for i, frame_number in enumerate(np.asarray(sample_frames).tolist())}
+    
+    def stored_landmarks(frame_number, frame, image):
+        i = rows.get(frame_number)
+        if i is None or np.isnan(sample_landmarks[i, 0, 0]):
+            return None
+        return sample_landmarks[i]
+    
+    try:
+        run_frame_pipeline(
+            cap, stored_landmarks, out, output_stride, prepare=False, timer=timer, output_size=output_size,
+            last_frame=last_frame
+        )
+    finally:
+        cap.release()
+        out.release()
+    
+    return output_path
+
+
+# On-disk cache of raw per-frame landmarks, keyed by video content and pose parameters
+LANDMARK_CACHE_DIR = Path(os.environ.get(
+    'SELARASSEHAT_CACHE_DIR', Path(tempfile.gettempdir()) / 'selarassehat_landmarks'
+))
+LANDMARK_CACHE_MAX_BYTES = int(os.environ.get('SELARASSEHAT_CACHE_MAX_MB', 512)) * 1024 * 1024
+
+
+def video_content_digest(video_path):
+    """SHA-256 hash object fed with the video bytes, to derive several cache keys from one read"""
+    digest = hashlib.sha256()
+    with open(video_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest
+
+
+def video_cache_key(video_path, content_digest=None, **params):
+    """Hash the video bytes together with the analysis parameters that affect landmarks
+    
+    `content_digest` is the video_content_digest() of `video_path`, if already computed.
+    """
+    digest = (content_digest or video_content_digest(video_path)).copy()
+    digest.update(json.dumps(params, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+# .npz field of each sample column in the landmark cache
+LANDMARK_CACHE_FIELDS = {
+    'frame': 'sample_frames',
+    'landmarks': 'sample_landmarks',
+    'reused': 'sample_reused',
+    'model_complexity': 'sample_model_complexity',
+}
+
+
+def load_cached_landmarks(cache_key):
+    """Load (sample columns, frame count) from the landmark cache, or None
+    
+    Entries written by older versions lack the newer columns; those are left out.
+    """
+    path = LANDMARK_CACHE_DIR / f"{cache_key}.npz"
+    try:
+        with np.load(path) as data:
+            samples = {name: data[field] for name, field in LANDMARK_CACHE_FIELDS.items() if field in data}
+            cached = samples, int(data['frame_count'])
+    except FileNotFoundError:
+        return None
+    except Exception:
+        # Unreadable entry (e.g. interrupted write): drop it and re-analyse
+        path.unlink(missing_ok=True)
+        return None
+    
+    os.utime(path)  # Mark as recently used for LRU eviction
+    return cached
+
+
+def save_cached_landmarks(cache_key, samples, frame_count):
+    """Store landmarks as a compressed .npz, then evict least recently used entries over the size cap"""
+    LANDMARK_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    path = LANDMARK_CACHE_DIR / f"{cache_key}.npz"
+    tmp_path = LANDMARK_CACHE_DIR / f"{cache_key}.{os.getpid()}.tmp.npz"
+    
+    np.savez_compressed(
+        tmp_path,
+        **{
+            field: np.asarray(samples[name], dtype=LANDMARK_DTYPES[name])
+            for name, field in LANDMARK_CACHE_FIELDS.items()
+        },
+        frame_count=frame_count
+    )
+    os.replace(tmp_path, path)
+    
+    entries = sorted(
+        (entry.stat().st_mtime, entry.stat().st_size, entry)
+        for entry in LANDMARK_CACHE_DIR.glob('*.npz') if '.tmp.' not in entry.name
+    )
+    total_size = sum(size for _, size, _ in entries)
+    for _, size, entry in entries:
+        if total_size <= LANDMARK_CACHE_MAX_BYTES or entry == path:
+            break
+        entry.unlink(missing_ok=True)
+        total_size -= size
+
+
+# Checkpoints of running analyses, next to the landmark cache but outside its size cap
+CHECKPOINT_DIR = LANDMARK_CACHE_DIR / 'checkpoints'
+
+# Wall-clock seconds between checkpoints of a running analysis (0 = no checkpoints)
+CHECKPOINT_INTERVAL_SEC = float(os.environ.get('SELARASSEHAT_CHECKPOINT_SEC', 30))
+
+# Checkpoints of analyses never resumed are removed after this long
+CHECKPOINT_MAX_AGE_SEC = 7 * 24 * 3600
+
+
+def checkpoint_key(cache_key, first_frame=1, last_frame=None):
+    """Checkpoint key of the analysis of frames first_frame..last_frame (None = to the end)"""
+    return f"{cache_key}_{first_frame}-{last_frame or 'end'}"
+
+
+class AnalysisCheckpoint:
+    """Periodic on-disk snapshots of the sampled landmarks of a running analysis
+    
+    Every save writes only the sample rows added since the previous one, as a
+    numbered .npz chunk in the checkpoint's directory, so checkpointing an hour-long
+    run stays cheap. Chunks are written to a temp file and renamed into place: a
+    crash leaves the last complete checkpoint, and other processes can restore()
+    while the run goes on.
+    """
+    
+    def __init__(self, key, interval_sec=CHECKPOINT_INTERVAL_SEC):
+        self.path = CHECKPOINT_DIR / key
+        self.interval_sec = interval_sec
+        self.saved_rows = 0
+        self._last_save = time.perf_counter()
+    
+    def restore(self, samples):
+        """Append the checkpointed rows to the ColumnStore `samples`; returns (last frame read, finished)
+        
+        Returns (0, False) without a checkpoint.
+        """
+        frame_count = 0
+        finished = False
+        try:
+            chunks = sorted(chunk for chunk in self.path.glob('*.npz') if '.tmp.' not in chunk.name)
+        except OSError:
+            chunks = []
+        for chunk in chunks:
+            if int(chunk.name.split('.')[0]) != self.saved_rows:
+                break
+            try:
+                with np.load(chunk) as data:
+                    rows = {name: data[field] for name, field in LANDMARK_CACHE_FIELDS.items()}
+                    frame_count, finished = int(data['frame_count']), bool(data['finished'])
+            except Exception:
+                # Removed by the finished run, or unreadable: keep what was restored so far
+                break
+            if len(rows['frame']):
+                samples.extend(**rows)
+            self.saved_rows += len(rows['frame'])
+        return frame_count, finished
+    
+    def update(self, samples, frame_count):
+        """Save if the last save is older than the interval"""
+        if self.interval_sec and time.perf_counter() - self._last_save >= self.interval_sec:
+            self.save(samples, frame_count)
+    
+    def save(self, samples, frame_count, finished=False):
+        """Write the rows of `samples` added since the last save, and the last frame read so far"""
+        self.path.mkdir(parents=True, exist_ok=True)
+        path = self.path / f"{self.saved_rows:010d}.npz"
+        tmp_path = self.path / f"{self.saved_rows:010d}.{os.getpid()}.tmp.npz"
+        
+        rows = {name: array[self.saved_rows:] for name, array in samples.columns().items()}
+        np.savez(
+            tmp_path,
+            **{field: rows[name] for name, field in LANDMARK_CACHE_FIELDS.items()},
+            frame_count=frame_count,
+            finished=finished
+        )
+        os.replace(tmp_path, path)
+        self.saved_rows = len(samples)
+        self._last_save = time.perf_counter()
+
+
+def clear_checkpoints(cache_key):
+    """Remove the checkpoints of a finished analysis, and any left by runs never resumed"""
+    expired = time.time() - CHECKPOINT_MAX_AGE_SEC
+    for path in CHECKPOINT_DIR.glob('*'):
+        try:
+            if path.name.startswith(f"{cache_key}_") or path.stat().st_mtime < expired:
+                shutil.rmtree(path, ignore_errors=True)
+        except OSError:
+            pass
+
+
+# Uploaded videos, copied to disk once per upload
+UPLOAD_DIR = Path(tempfile.gettempdir()) / 'selarassehat_uploads'
+UPLOAD_CHUNK_BYTES = 8 * 1024 * 1024
+
+# Uploads unused for this long (e.g. of closed sessions) are removed
+UPLOAD_MAX_AGE_SEC = int(os.environ.get('SELARASSEHAT_UPLOAD_MAX_AGE_SEC', 6 * 3600))
+
+
+def save_upload(uploaded_file, chunk_size=UPLOAD_CHUNK_BYTES):
+    """Copy an uploaded file to disk in chunks and return its path
+    
+    The file is named by the upload's file_id and keeps its container suffix, so
+    reruns of the script reuse it instead of writing a new copy. Each call marks
+    the file as in use; copies unused for UPLOAD_MAX_AGE_SEC are swept away.
+    """
+    suffix = Path(uploaded_file.name).suffix.lower() or '.mp4'
+    path = UPLOAD_DIR / f"{uploaded_file.file_id}{suffix}"
+    if path.exists() and path.stat().st_size == uploaded_file.size:
+        os.utime(path)
+        return str(path)
+    
+    UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+    sweep_uploads()
+    tmp_path = UPLOAD_DIR / f"{uploaded_file.file_id}.{os.getpid()}.tmp{suffix}"
+    uploaded_file.seek(0)
+    with open(tmp_path, 'wb') as f:
+        shutil.copyfileobj(uploaded_file, f, chunk_size)
+    os.replace(tmp_path, path)
+    return str(path)
+
+
+def sweep_uploads(max_age_sec=UPLOAD_MAX_AGE_SEC):
+    """Remove uploaded copies (and interrupted temp copies) not used for `max_age_sec` seconds"""
+    expired = time.time() - max_age_sec
+    for path in UPLOAD_DIR.glob('*'):
+        try:
+            if path.stat().st_mtime < expired:
+                path.unlink()
+        except OSError:
+            pass
+
+
+class VideoAnalysis:
+    """Landmarks and RULA scores of one analysed video; the annotated video is rendered on demand"""
+    
+    def __init__(self, video_path, fps, frame_stride, samples, frame_count, timer=None, side='right'):
+        self.video_path = video_path
+        self.fps = fps
+        self.frame_stride = frame_stride
+        self.side = side
+        self.sample_frames = np.asarray(samples['frame'], dtype=np.int64)
+        self.sample_landmarks = sample_landmarks = samples['landmarks']
+        self.sample_reused = np.asarray(samples['reused'], dtype=bool)
+        self.sample_models = np.asarray(samples['model_complexity'], dtype=np.int8)
+        self.frame_count = frame_count
+        self.frames_inferred = int((~self.sample_reused).sum())
+        self.poses_detected = int((~np.isnan(sample_landmarks[~self.sample_reused, 0, 0])).sum())
+        self.output_video_path = None
+        self.output_profile = None
+        self.timer = timer or StageTimer()
+        self.render_timer = None
+        
+        # Fill skipped frames, then calculate RULA for all frames with a pose at once
+        with self.timer.measure('interpolate'):
+            frames, landmarks, measured = fill_skipped_frames(
+                self.sample_frames, sample_landmarks, frame_count, frame_stride
+            )
+            # Each row's sample, or the one before it for interpolated rows
+            sample = np.searchsorted(self.sample_frames, frames, side='right') - 1
+            reused = measured & self.sample_reused[sample]
+        with self.timer.measure('scoring'):
+            self.results = build_results(
+                frames, landmarks, fps, measured, reused, self.sample_models[sample], side
+            )
+            columns = self.results.columns()
+            self.stats = RunningStats(max_gap_sec=1.5 / fps)
+            self.stats.update(
+                columns['time_sec'], columns['rula_score'], 1 / fps,
+                **{name: columns[name] for name in self.stats.flag_counts}
+            )
+    
+    @property
+    def results_df(self):
+        """Per-frame results as a DataFrame over the compact result columns (no copy)"""
+        return self.results.to_dataframe()
+    
+    @property
+    def nbytes(self):
+        """Memory held by the landmark and result arrays"""
+        return self.results.nbytes + sum(
+            array.nbytes for array in (self.sample_frames, self.sample_landmarks, self.sample_reused, self.sample_models)
+        )
+    
+    @property
+    def side_usage(self):
+        """Number of result rows scored on each body side"""
+        counts = np.bincount(self.results.columns()['side'], minlength=len(SIDES))
+        return dict(zip(SIDES, counts.tolist()))
+    
+    @property
+    def model_usage(self):
+        """Number of inferred frames per Pose model complexity"""
+        models, counts = np.unique(self.sample_models[~self.sample_reused], return_counts=True)
+        return dict(zip(models.tolist(), counts.tolist()))
+    
+    @property
+    def video_rendered(self):
+        return self.output_video_path is not None and os.path.exists(self.output_video_path)
+    
+    def is_rendered(self, profile=DEFAULT_VIDEO_PROFILE):
+        return self.video_rendered and self.output_profile == profile
+    
+    @property
+    def output_mime(self):
+        """MIME type of the rendered video, from its container"""
+        return VIDEO_MIME_TYPES.get(Path(self.output_video_path).suffix, 'application/octet-stream')
+    
+    @property
+    def timings(self):
+        """StageTimer summaries of the analysis and, once rendered, of the render step"""
+        timings = {'analysis': self.timer.summary()}
+        if self.render_timer is not None:
+            timings['render'] = self.render_timer.summary()
+        return timings
+    
+    def timings_json(self):
+        return json.dumps(self.timings, indent=2)
+    
+    def render_video(self, profile=DEFAULT_VIDEO_PROFILE):
+        """Render the annotated video from the stored landmarks (once per profile) and return its path
+        
+        Rendering another profile replaces the previous output.
+        """
+        if not self.is_rendered(profile):
+            if self.video_rendered:
+                os.unlink(self.output_video_path)
+            
+            self.render_timer = StageTimer()
+            with self.render_timer.measure('total'):
+                self.output_video_path = render_annotated_video(
+                    self.video_path, self.sample_frames, self.sample_landmarks, self.frame_stride,
+                    timer=self.render_timer, profile=profile, last_frame=self.frame_count
+                )
+            self.output_profile = profile
+            
+            # Verify video was created
+            if not os.path.exists(self.output_video_path):
+                raise Exception("Video file was not created")
+        
+        return self.output_video_path
+
+
+def _landmark_options(fps, frame_stride=1, analysis_fps=None, model_complexity=1, min_detection_confidence=0.5,
+                      min_tracking_confidence=0.5, motion_threshold=None, motion_max_reuse_sec=MOTION_MAX_REUSE_SEC,
+                      time_budget_sec=None, min_fps=None):
+    """Resolve analyze_video() options into (frame stride, pose, gate and adaptive options)"""
+    frame_stride = resolve_frame_stride(fps, frame_stride, analysis_fps)
+    pose_options = {
+        'model_complexity': model_complexity,
+        'min_detection_confidence': min_detection_confidence,
+        'min_tracking_confidence': min_tracking_confidence,
+    }
+    gate_options = {}
+    if motion_threshold:
+        gate_options = {'motion_threshold': motion_threshold, 'motion_max_reuse_sec': motion_max_reuse_sec}
+    adaptive_options = {}
+    if time_budget_sec or min_fps:
+        adaptive_options = {'time_budget_sec': time_budget_sec, 'min_fps': min_fps}
+    return frame_stride, pose_options, gate_options, adaptive_options
+
+
+def landmark_cache_key(video_path, frame_stride, inference_width, pose_options, gate_options, adaptive_options,
+                       content_digest=None):
+    """Landmark cache and checkpoint key of a video analysed with these options"""
+    return video_cache_key(
+        video_path, content_digest, frame_stride=frame_stride, inference_width=inference_width, **pose_options,
+        **gate_options, **adaptive_options
+    )
+
+
+def analyze_video(video_path, progress=None, frame_stride=1, analysis_fps=None, inference_width=None,
+                  workers=1, model_complexity=1, min_detection_confidence=0.5, min_tracking_confidence=0.5,
+                  use_cache=True, motion_threshold=None, motion_max_reuse_sec=MOTION_MAX_REUSE_SEC,
+                  time_budget_sec=None, min_fps=None, side='right', checkpoint_sec=CHECKPOINT_INTERVAL_SEC,
+                  content_digest=None):
+    """Detect pose landmarks and calculate RULA scores, without rendering a video
+    
+    Decoding runs on a pipelined decoder thread feeding a bounded queue, with
+    inference kept in frame order on the calling thread.
+    
+    With `frame_stride` k > 1 (or `analysis_fps` Hz) pose inference runs on every
+    k-th frame only; the frames in between are skipped with cap.grab() and their
+    landmarks interpolated.
+    
+    With `inference_width` set, frames are downscaled before the RGB conversion and
+    pose inference.
+    
+    With `workers` > 1 the video is split into time segments analysed by that many
+    processes, each with its own Pose model.
+    
+    With `motion_threshold` set, frames where at most that percentage of pixels
+    changed since the last inferred frame reuse its landmarks instead of running
+    pose inference, for at most `motion_max_reuse_sec` seconds in a row (see
+    MotionGate). The results mark those rows as `reused`.
+    
+    With `time_budget_sec` or `min_fps` set, `model_complexity` is only the starting
+    model: throughput is measured as the analysis runs and the model switched
+    between complexity 0, 1 and 2 to finish within the budget or keep up with the
+    rate (see AdaptivePose). The results record the model behind every row.
+    
+    `side` picks the body side scored in each frame: 'right', 'left', the side
+    with the worse score ('worst') or the more visible arm ('visible'); see
+    RULACalculator.calculate_rula_batch. The results record the side of every row.
+    
+    With `use_cache`, raw landmarks are stored on disk keyed by the video content
+    and pose parameters (`content_digest` saves re-reading the video when its
+    video_content_digest() is at hand); on a cache hit no model is loaded. Progress is also
+    checkpointed every `checkpoint_sec` seconds, so a run that is interrupted
+    resumes from its last checkpoint when called again with the same options;
+    load_partial_analysis() reads the checkpointed results while a run goes on.
+    
+    `progress` is a ProgressReporter or a callback taking its stats dict.
+    
+    Stage timings are kept in the returned VideoAnalysis (see its timings).
+    
+    Returns a VideoAnalysis; call its render_video() for the annotated video.
+    """
+    started = time.perf_counter()
+    timer = StageTimer()
+    cap, fps, _, _, total_frames = open_video(video_path)
+    frame_stride, pose_options, gate_options, adaptive_options = _landmark_options(
+        fps, frame_stride, analysis_fps, model_complexity, min_detection_confidence, min_tracking_confidence,
+        motion_threshold, motion_max_reuse_sec, time_budget_sec, min_fps
+    )
+    progress = as_progress_reporter(progress)
+    if progress:
+        progress.start(total_frames)
+    
+    cache_key = None
+    cached = None
+    if use_cache:
+        cache_key = landmark_cache_key(
+            video_path, frame_stride, inference_width, pose_options, gate_options, adaptive_options, content_digest
+        )
+        with timer.measure('cache_load'):
+            cached = load_cached_landmarks(cache_key)
+    
+    if cached is not None:
+        cap.release()
+        samples, frame_count = cached
+        # Entries from before motion gating and adaptive models lack these columns
+        samples.setdefault('reused', np.zeros(len(samples['frame']), dtype=bool))
+        samples.setdefault('model_complexity', np.full(len(samples['frame']), model_complexity, dtype=np.int8))
+    elif workers > 1 and total_frames > 0:
+        cap.release()
+        samples, frame_count = _analyze_segments_parallel(
+            video_path, total_frames, workers, frame_stride, inference_width, pose_options, progress, timer,
+            gate_options, adaptive_options, cache_key, checkpoint_sec
+        )
+    else:
+        # Landmarks of sampled frames (NaN rows where no pose), scored in one batch at the end
+        samples = ColumnStore(LANDMARK_DTYPES, capacity=total_frames // frame_stride + 1, shapes=LANDMARK_SHAPES)
+        checkpoint = None
+        frame_count = 0
+        if cache_key and checkpoint_sec:
+            checkpoint = AnalysisCheckpoint(checkpoint_key(cache_key), checkpoint_sec)
+            frame_count, _ = checkpoint.restore(samples)
+        
+        # Resuming: re-analyse a few frames before the checkpoint so pose tracking settles, as for segments
+        first_frame = frame_count + 1
+        start = max(1, first_frame - SEGMENT_WARMUP_FRAMES) if frame_count else 1
+        if start > 1:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start - 1)
+        gate = create_motion_gate(fps, frame_stride, **gate_options, start_frame=first_frame)
+        landmarks = np.nan
+        landmarks_model = None
+        inferred = ~samples.columns()['reused']
+        frames_inferred = int(inferred.sum())
+        poses_detected = int((~np.isnan(samples.columns()['landmarks'][inferred, 0, 0])).sum())
+        
+        def analyze_frame(frame_number, frame, image):
+            nonlocal landmarks, landmarks_model, frames_inferred, poses_detected
+            
+            # Process with MediaPipe (in frame order, on this thread); unchanged frames reuse the last landmarks
+            if image is not None:
+                landmarks_model = pose.model_complexity
+                with timer.measure('pose'):
+                    results = pose.process(image)
+                frames_inferred += 1
+                if results.pose_landmarks:
+                    landmarks = landmarks_to_array(results.pose_landmarks.landmark)
+                    poses_detected += 1
+                else:
+                    landmarks = np.nan
+            
+            # Store landmarks for batch RULA scoring
+            if frame_number >= first_frame:
+                samples.append(
+                    frame=frame_number, landmarks=landmarks, reused=image is None, model_complexity=landmarks_model
+                )
+                if checkpoint is not None:
+                    checkpoint.update(samples, frame_number)
+            pose.step(frame_number)
+            
+            if progress:
+                progress.update(frame_number, frames_inferred, poses_detected)
+            return None
+        
+        try:
+            with pose_session(**pose_options) as model, AdaptivePose(
+                model, pose_options, total_frames, first_frame=start, **adaptive_options
+            ) as pose:
+                frame_count = run_frame_pipeline(
+                    cap, analyze_frame, frame_stride=frame_stride, inference_width=inference_width,
+                    first_frame=start, timer=timer, gate=gate
+                )
+        finally:
+            cap.release()
+        
+        samples = samples.compact().columns()
+    
+    if cache_key is not None and cached is None:
+        save_cached_landmarks(cache_key, samples, frame_count)
+        clear_checkpoints(cache_key)
+    
+    analysis = VideoAnalysis(video_path, fps, frame_stride, samples, frame_count, timer, side)
+    timer.record('total', time.perf_counter() - started)
+    if progress:
+        progress.finish(frame_count, analysis.frames_inferred, analysis.poses_detected)
+    return analysis
+
+
+def load_partial_analysis(video_path, frame_stride=1, analysis_fps=None, inference_width=None, workers=1,
+                          model_complexity=1, min_detection_confidence=0.5, min_tracking_confidence=0.5,
+                          motion_threshold=None, motion_max_reuse_sec=MOTION_MAX_REUSE_SEC, time_budget_sec=None,
+                          min_fps=None, side='right', **ignored):
+    """VideoAnalysis of the frames analysed so far by a running or interrupted analyze_video(), or None
+    
+    Takes the options of the analyze_video() or process_video() call (those that
+    do not affect landmarks are ignored) and reads its checkpoints without
+    disturbing the run. With `workers` > 1 the results cover the segments up to
+    the first unfinished one. Once the run has finished, returns its complete
+    analysis from the landmark cache.
+    """
+    cap, fps, _, _, total_frames = open_video(video_path)
+    cap.release()
+    frame_stride, pose_options, gate_options, adaptive_options = _landmark_options(
+        fps, frame_stride, analysis_fps, model_complexity, min_detection_confidence, min_tracking_confidence,
+        motion_threshold, motion_max_reuse_sec, time_budget_sec, min_fps
+    )
+    cache_key = landmark_cache_key(
+        video_path, frame_stride, inference_width, pose_options, gate_options, adaptive_options
+    )
+    
+    cached = load_cached_landmarks(cache_key)
+    if cached is not None:
+        samples, frame_count = cached
+        samples.setdefault('reused', np.zeros(len(samples['frame']), dtype=bool))
+        samples.setdefault(
+            'model_complexity', np.full(len(samples['frame']), pose_options['model_complexity'], dtype=np.int8)
+        )
+        return VideoAnalysis(video_path, fps, frame_stride, samples, frame_count, side=side)
+    
+    segments = _segment_bounds(total_frames, workers) if workers > 1 and total_frames > 0 else [(1, None)]
+    samples = ColumnStore(LANDMARK_DTYPES, shapes=LANDMARK_SHAPES)
+    frame_count = 0
+    for first, last in segments:
+        last_read, finished = AnalysisCheckpoint(checkpoint_key(cache_key, first, last)).restore(samples)
+        frame_count = max(frame_count, last_read)
+        if not finished:
+            break
+    
+    if len(samples) == 0:
+        return None
+    return VideoAnalysis(video_path, fps, frame_stride, samples.compact().columns(), frame_count, side=side)
+
+
+# In-memory cache of analysis results, shared by reruns and sessions of this process:
+# entries expire after the TTL, and the least recently used go once over the byte budget
+RESULTS_CACHE_TTL_SEC = int(os.environ.get('SELARASSEHAT_RESULTS_TTL_SEC', 3600))
+RESULTS_CACHE_MAX_BYTES = int(os.environ.get('SELARASSEHAT_RESULTS_MAX_MB', 1024)) * 1024 * 1024
+
+
+class ResultsCache:
+    """Thread-safe LRU of VideoAnalysis objects with a TTL and a budget on their array bytes
+    
+    get() hands out shallow copies, so rendering in one session does not touch
+    the rendered video of another.
+    """
+    
+    def __init__(self, ttl_sec=RESULTS_CACHE_TTL_SEC, max_bytes=RESULTS_CACHE_MAX_BYTES):
+        self.ttl_sec = ttl_sec
+        self.max_bytes = max_bytes
+        self._entries = collections.OrderedDict()  # key -> (expiry time, analysis)
+        self._lock = threading.Lock()
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    @property
+    def nbytes(self):
+        return sum(analysis.nbytes for _, analysis in self._entries.values())
+    
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return copy.copy(entry[1])
+    
+    def put(self, key, analysis):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_sec, copy.copy(analysis))
+            self._entries.move_to_end(key)
+            now = time.monotonic()
+            for expired in [key for key, (expires, _) in self._entries.items() if expires < now]:
+                del self._entries[expired]
+            total = self.nbytes
+            while total > self.max_bytes and len(self._entries) > 1:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                total -= evicted.nbytes
+
+
+@st.cache_resource(show_spinner=False)
+def get_results_cache():
+    """The process-wide ResultsCache, created once"""
+    return ResultsCache()
+
+
+def analyze_video_cached(video_path, progress=None, **options):
+    """analyze_video() with results cached in memory by video content and options
+    
+    Repeat requests for the same clip, from any session, return immediately until
+    the entry expires (SELARASSEHAT_RESULTS_TTL_SEC) or is evicted to keep the
+    cached arrays within SELARASSEHAT_RESULTS_MAX_MB. The video is read once for
+    both this key and, on a miss, the landmark cache key.
+    
+    The analysis itself runs outside any Streamlit cache, so `progress` may drive
+    Streamlit elements.
+    """
+    content_digest = video_content_digest(video_path)
+    cache_key = video_cache_key(video_path, content_digest, **options)
+    cache = get_results_cache()
+    analysis = cache.get(cache_key)
+    if analysis is not None:
+        # Same content, possibly analysed from another session's upload: render from this copy
+        analysis.video_path = video_path
+    else:
+        analysis = analyze_video(video_path, progress, **options, content_digest=content_digest)
+        cache.put(cache_key, analysis)
+        return analysis
+    
+    progress = as_progress_reporter(progress)
+    if progress:
+        progress.start()
+        progress.finish(analysis.frame_count, analysis.frames_inferred, analysis.poses_detected)
+    return analysis
+
+
+def process_video(video_path, progress=None, render=True, video_profile=DEFAULT_VIDEO_PROFILE, **options):
+    """Process video and calculate RULA scores
+    
+    Runs analyze_video (see there for `options`) and, with `render`, the separate
+    render step for the annotated video in `video_profile`. Returns (output video
+    path or None, results).
+    """
+    analysis = analyze_video(video_path, progress, **options)
+    output_path = analysis.render_video(profile=video_profile) if render else None
+    return output_path, analysis.results_df
+
+
+class RingBuffer:
+    """Typed column arrays keeping only the most recent `capacity` rows
+    
+    Thread-safe: one thread appends while others take ordered snapshots.
+    """
+    
+    def __init__(self, dtypes, capacity):
+        self.capacity = capacity
+        self.count = 0  # Rows appended in total
+        self._arrays = {name: np.zeros(capacity, dtype=dtype) for name, dtype in dtypes.items()}
+        self._lock = threading.Lock()
+    
+    def __len__(self):
+        return min(self.count, self.capacity)
+    
+    def append(self, **row):
+        with self._lock:
+            i = self.count % self.capacity
+            for name, value in row.items():
+                self._arrays[name][i] = value
+            self.count += 1
+    
+    def columns(self):
+        """Copies of the buffered rows, oldest first"""
+        with self._lock:
+            if self.count <= self.capacity:
+                return {name: array[:self.count].copy() for name, array in self._arrays.items()}
+            i = self.count % self.capacity
+            return {name: np.concatenate([array[i:], array[:i]]) for name, array in self._arrays.items()}
+    
+    def to_dataframe(self):
+        return pd.DataFrame(self.columns(), copy=False)
+
+
+# Live mode: rows of the score ring buffer and default buffer sizes
+LIVE_DTYPES = {
+    'frame': np.int64,
+    'time_sec': np.float64,
+    **{column: RESULT_DTYPES[column] for column in RESULT_COLUMNS},
+    'side': RESULT_DTYPES['side'],
+    'latency_ms': np.float32,
+}
+LIVE_BUFFER_SECONDS = 300
+LIVE_RECENT_FRAMES = 30
+
+
+def open_live_source(source):
+    """Open a camera index, stream URL or video file; returns (capture, fps, is_file)
+    
+    Video files are replayed at their native rate, as a local stand-in for a camera.
+    """
+    source = str(source).strip()
+    is_file = os.path.isfile(source)
+    cap = cv2.VideoCapture(int(source) if source.isdigit() else source)
+    if not cap.isOpened():
+        raise Exception(f"Could not open video source {source}")
+    
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    return cap, fps if fps and fps > 0 else 30.0, is_file
+
+
+class LiveAnalyzer:
+    """Near-real-time RULA scoring of a camera, stream or replayed file
+    
+    A capture thread reads frames at the source's rate and keeps only the newest
+    one; an analysis thread runs pose inference and scoring on whatever frame is
+    newest when it is free, so under load frames are dropped (and counted) instead
+    of queueing up. Scores go into a ring buffer of the last `buffer_seconds`, the
+    annotated frames into one of the last `recent_frames`. Each row records the
+    latency from capture to scored result and the body side scored (see SIDE_MODES).
+    """
+    
+    def __init__(self, source, inference_width=None, buffer_seconds=LIVE_BUFFER_SECONDS,
+                 recent_frames=LIVE_RECENT_FRAMES, side='right', **pose_options):
+        self.source = source
+        self.inference_width = inference_width
+        self.side = side
+        self.pose_options = pose_options
+        self.cap, self.fps, self.is_file = open_live_source(source)
+        
+        self.scores = RingBuffer(LIVE_DTYPES, max(1, int(buffer_seconds * self.fps)))
+        self.recent_frames = collections.deque(maxlen=recent_frames)
+        self.running_stats = RunningStats()  # Whole session, unlike the ring buffer
+        self._stats_lock = threading.Lock()
+        self._last_scored = None  # Capture time of the previous scored frame
+        self.frames_captured = 0
+        self.frames_analyzed = 0
+        self.frames_dropped = 0
+        self.error = None
+        
+        self._latest = None  # (frame number, frame, capture time) not yet analysed
+        self._new_frame = threading.Condition()
+        self._stop_event = threading.Event()
+        self._started = None
+        self._threads = []
+    
+    @property
+    def running(self):
+        return any(thread.is_alive() for thread in self._threads)
+    
+    def start(self):
+        self._started = time.perf_counter()
+        self._threads = [
+            threading.Thread(target=self._capture, name='selarassehat-live-capture', daemon=True),
+            threading.Thread(target=self._analyze, name='selarassehat-live-analyze', daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        return self
+    
+    def stop(self):
+        self._stop_event.set()
+        with self._new_frame:
+            self._new_frame.notify_all()
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join()
+        self.cap.release()
+    
+    def _capture(self):
+        try:
+            while not self._stop_event.is_set():
+                ret, frame = self.cap.read()
+                if not ret:
+                    break
+                captured_at = time.perf_counter()
+                self.frames_captured += 1
+                
+                with self._new_frame:
+                    if self._latest is not None:
+                        self.frames_dropped += 1  # Analysis is behind: replace the waiting frame
+                    self._latest = (self.frames_captured, frame, captured_at)
+                    self._new_frame.notify()
+                
+                if self.is_file:
+                    # Replay at the file's native rate
+                    delay = self._started + self.frames_captured / self.fps - time.perf_counter()
+                    if delay > 0:
+                        self._stop_event.wait(delay)
+        except Exception as e:
+            self.error = e
+        finally:
+            # Release the source here too, as it may end by itself with nobody calling stop()
+            self.cap.release()
+            self._stop_event.set()
+            with self._new_frame:
+                self._new_frame.notify_all()
+    
+    def _analyze(self):
+        try:
+            with create_pose(**self.pose_options) as pose:
+                while True:
+                    with self._new_frame:
+                        while self._latest is None and not self._stop_event.is_set():
+                            self._new_frame.wait()
+                        if self._latest is None:
+                            break
+                        frame_number, frame, captured_at = self._latest
+                        self._latest = None
+                    
+                    self._analyze_frame(pose, frame_number, frame, captured_at)
+        except Exception as e:
+            self.error = e
+            self._stop_event.set()
+    
+    def _analyze_frame(self, pose, frame_number, frame, captured_at):
+        results = pose.process(prepare_inference_image(frame, self.inference_width))
+        self.frames_analyzed += 1
+        
+        if results.pose_landmarks:
+            landmarks = landmarks_to_array(results.pose_landmarks.landmark)
+            rula_data = RULACalculator.calculate_rula_batch(landmarks[None], self.side)
+            draw_pose_landmarks(frame, landmarks)
+            
+            row = {column: rula_data[column][0] for column in RESULT_COLUMNS}
+            time_sec = captured_at - self._started
+            self.scores.append(
+                frame=frame_number,
+                time_sec=time_sec,
+                **row,
+                side=rula_data['side'][0],
+                latency_ms=(time.perf_counter() - captured_at) * 1000
+            )
+            
+            # A scored frame stands for the time since the previous one, up to the gap limit
+            if self._last_scored is None:
+                duration = 1 / self.fps
+            else:
+                duration = min(captured_at - self._last_scored, self.running_stats.max_gap_sec)
+            self._last_scored = captured_at
+            with self._stats_lock:
+                self.running_stats.update(
+                    time_sec, row['rula_score'], duration,
+                    **{name: row[name] for name in self.running_stats.flag_counts}
+                )
+        
+        self.recent_frames.append((frame_number, frame))
+    
+    def results_df(self):
+        """Buffered per-frame scores, oldest first"""
+        return self.scores.to_dataframe()
+    
+    def summary(self):
+        """RunningStats summary of the whole session so far"""
+        with self._stats_lock:
+            return self.running_stats.summary()
+    
+    def stats(self):
+        elapsed = time.perf_counter() - self._started if self._started else 0.0
+        latency = self.scores.columns()['latency_ms']
+        return {
+            'frames_captured': self.frames_captured,
+            'frames_analyzed': self.frames_analyzed,
+            'frames_dropped': self.frames_dropped,
+            'analysis_fps': self.frames_analyzed / elapsed if elapsed > 0 else 0.0,
+            'latency_ms': float(np.median(latency)) if len(latency) else None,
+            'latency_p95_ms': float(np.percentile(latency, 95)) if len(latency) else None,
+        }
+
+
+# Most points drawn per timeline trace; longer recordings are downsampled for display only
+TIMELINE_MAX_POINTS = 4000
+
+
+def downsample_indices(values, max_points=TIMELINE_MAX_POINTS):
+    """Indices of about `max_points` of `values` that keep the shape of the series, in order
+    
+    Min/max bucketing: the series is cut into max_points / 4 equal buckets and each
+    keeps its first, last, lowest and highest point, so single-frame peaks survive.
+    """
+    values = np.asarray(values)
+    n = len(values)
+    if n <= max_points:
+        return np.arange(n)
+    
+    buckets = max(1, max_points // 4)
+    size = -(-n // buckets)
+    # Pad the last bucket with the final value; indices into the padding are clipped back to it
+    padded = np.pad(values, (0, buckets * size - n), mode='edge').reshape(buckets, size)
+    starts = np.arange(buckets) * size
+    indices = np.concatenate([
+        starts, starts + padded.argmin(axis=1), starts + padded.argmax(axis=1), starts + size - 1
+    ])
+    return np.unique(np.minimum(indices, n - 1))
+
+
+def timeline_trace(df, column, **trace_options):
+    """WebGL line trace of `column` over time, downsampled to TIMELINE_MAX_POINTS"""
+    times = df['time_sec'].to_numpy()
+    values = df[column].to_numpy()
+    indices = downsample_indices(values)
+    return go.Scattergl(x=times[indices], y=values[indices], **trace_options)
+
+
+def create_score_timeline(df, lang='en'):
+    """Create interactive timeline plot"""
+    fig = go.Figure()
+    
+    fig.add_trace(timeline_trace(
+        df, 'rula_score',
+        mode='lines+markers',
+        name='RULA Score',
+        line=dict(color='rgb(0, 123, 255)', width=2),
+        marker=dict(size=6)
+    ))
+    
+    # Add risk level zones
+    fig.add_hrect(y0=0, y1=2, fillcolor="green", opacity=0.1, line_width=0)
+    fig.add_hrect(y0=2, y1=3, fillcolor="yellow", opacity=0.1, line_width=0)
+    fig.add_hrect(y0=3, y1=5, fillcolor="orange", opacity=0.1, line_width=0)
+    fig.add_hrect(y0=5, y1=7, fillcolor="red", opacity=0.1, line_width=0)
+    
+    fig.update_layout(
+        title=TRANSLATIONS[lang]['score_timeline'],
+        xaxis_title='Time (seconds)' if lang == 'en' else 'Waktu (detik)',
+        yaxis_title='RULA Score' if lang == 'en' else 'Skor RULA',
+        yaxis=dict(range=[0, 7.5], dtick=1),
+        hovermode='x unified',
+        height=400
+    )
+    
+    return fig
+
+
+def create_score_timeline_comparison(df, lang='en'):
+    """Create interactive timeline plot comparing original and adjusted scores"""
+    fig = go.Figure()
+    
+    # Original scores
+    fig.add_trace(timeline_trace(
+        df, 'rula_score',
+        mode='lines+markers',
+        name='Original RULA' if lang == 'en' else 'RULA Asli',
+        line=dict(color='rgb(0, 123, 255)', width=2, dash='dash'),
+        marker=dict(size=4),
+        opacity=0.6
+    ))
+    
+    # Adjusted scores
+    fig.add_trace(timeline_trace(
+        df, 'adjusted_rula_score',
+        mode='lines+markers',
+        name='Adjusted RULA' if lang == 'en' else 'RULA Disesuaikan',
+        line=dict(color='rgb(255, 0, 0)', width=2),
+        marker=dict(size=6)
+    ))
+    
+    # Add risk level zones
+    fig.add_hrect(y0=0, y1=2, fillcolor="green", opacity=0.1, line_width=0)
+    fig.add_hrect(y0=2, y1=3, fillcolor="yellow", opacity=0.1, line_width=0)
+    fig.add_hrect(y0=3, y1=5, fillcolor="orange", opacity=0.1, line_width=0)
+    fig.add_hrect(y0=5, y1=7, fillcolor="red", opacity=0.1, line_width=0)
+    
+    fig.update_layout(
+        title='RULA Score Comparison' if lang == 'en' else 'Perbandingan Skor RULA',
+        xaxis_title='Time (seconds)' if lang == 'en' else 'Waktu (detik)',
+        yaxis_title='RULA Score' if lang == 'en' else 'Skor RULA',
+        yaxis=dict(range=[0, 7.5], dtick=1),
+        hovermode='x unified',
+        height=400,
+        showlegend=True
+    )
+    
+    return fig
+
+
+def get_risk_level(score):
+    """Determine risk level from RULA score"""
+    if score <= 2:
+        return 1
+    elif score <= 4:
+        return 2
+    elif score <= 6:
+        return 3
+    else:
+        return 4
+
+
+def show_risk_exposure(t, summary):
+    """Seconds spent in each risk level and the longest continuous high-risk stretch"""
+    st.markdown(f"#### {t['exposure_title']}")
+    columns = st.columns(5)
+    for level, column in zip(range(1, 5), columns):
+        with column:
+            seconds = summary['risk_level_seconds'][level]
+            share = seconds / summary['seconds'] if summary['seconds'] else 0.0
+            st.metric(t['risk_level_time'].format(level=level), f"{seconds:.1f} s", f"{share:.0%}", delta_color='off')
+    with columns[4]:
+        st.metric(t['longest_high_risk'], f"{summary['longest_high_risk_sec']:.1f} s")
+
+
+# Seconds between refreshes of the live view
+LIVE_REFRESH_SEC = 0.5
+
+
+def show_live_analysis(t, lang, inference_width=None, side='right'):
+    """Live camera / stream mode: start, stop and monitor a LiveAnalyzer"""
+    source = st.text_input(t['live_source_label'], value='0', help=t['live_source_help'])
+    analyzer = st.session_state.get('live_analyzer')
+    
+    start_col, stop_col = st.columns(2)
+    with start_col:
+        if st.button('▶️ ' + t['live_start'], type='primary', disabled=analyzer is not None and analyzer.running):
+            try:
+                analyzer = LiveAnalyzer(source, inference_width=inference_width, side=side).start()
+                st.session_state.live_analyzer = analyzer
+            except Exception as e:
+                st.error(f"{t['error_processing']}: {str(e)}")
+    with stop_col:
+        if st.button('⏹️ ' + t['live_stop'], disabled=analyzer is None or not analyzer.running):
+            analyzer.stop()
+    
+    if analyzer is None:
+        return
+    
+    frame_slot = st.empty()
+    metrics_slot = st.empty()
+    chart_slot = st.empty()
+    refresh = 0
+    
+    # Redraw until the source ends; pressing Stop reruns the script, which ends this loop
+    while True:
+        stats = analyzer.stats()
+        df = analyzer.results_df()
+        
+        if analyzer.recent_frames:
+            frame_slot.image(analyzer.recent_frames[-1][1], channels='BGR')
+        
+        with metrics_slot.container():
+            mcol1, mcol2, mcol3, mcol4 = st.columns(4)
+            with mcol1:
+                st.metric(t['live_current_score'], int(df['rula_score'].iloc[-1]) if len(df) else '-')
+            with mcol2:
+                st.metric(t['live_fps'], f"{stats['analysis_fps']:.1f}")
+            with mcol3:
+                latency = stats['latency_ms']
+                st.metric(t['live_latency'], '-' if latency is None else f"{latency:.0f} ms")
+            with mcol4:
+                st.metric(t['live_dropped'], f"{stats['frames_dropped']} / {stats['frames_captured']}")
+            
+            summary = analyzer.summary()
+            if summary['frames']:
+                st.metric(t['live_session_avg'], f"{summary['avg_score']:.1f}")
+                show_risk_exposure(t, summary)
+        
+        if len(df):
+            chart_slot.plotly_chart(
+                create_score_timeline(df, lang), use_container_width=True, key=f"live_timeline_{refresh}"
+            )
+        
+        if not analyzer.running:
+            break
+        refresh += 1
+        time.sleep(LIVE_REFRESH_SEC)
+    
+    if analyzer.error is not None:
+        st.error(f"{t['error_processing']}: {str(analyzer.error)}")
+
+
+def main():
+    # Language selector in sidebar
+    lang = st.sidebar.selectbox(
+        TRANSLATIONS['en']['lang_label'],
+        options=['en', 'id'],
+        format_func=lambda x: 'English' if x == 'en' else 'Bahasa Indonesia'
+    )
+    
+    t = TRANSLATIONS[lang]
+    
+    # Analysis settings in sidebar
+    frame_stride = st.sidebar.number_input(
+        t['frame_stride_label'],
+        min_value=1,
+        max_value=30,
+        value=1,
+        step=1,
+        help=t['frame_stride_help']
+    )
+    inference_width = st.sidebar.selectbox(
+        t['inference_width_label'],
+        options=[None, 1280, 960, 640],
+        format_func=lambda x: t['inference_width_original'] if x is None else f"{x} px",
+        help=t['inference_width_help']
+    )
+    workers = st.sidebar.number_input(
+        t['workers_label'],
+        min_value=1,
+        max_value=os.cpu_count() or 1,
+        value=1,
+        step=1,
+        help=t['workers_help']
+    )
+    motion_threshold = st.sidebar.number_input(
+        t['motion_threshold_label'],
+        min_value=0.0,
+        max_value=10.0,
+        value=0.0,
+        step=0.1,
+        help=t['motion_threshold_help']
+    )
+    motion_max_reuse_sec = st.sidebar.number_input(
+        t['motion_max_reuse_label'],
+        min_value=0.5,
+        max_value=30.0,
+        value=MOTION_MAX_REUSE_SEC,
+        step=0.5,
+        disabled=not motion_threshold
+    )
+    pose_model = st.sidebar.selectbox(
+        t['pose_model_label'],
+        options=[0, 1, 2, 'adaptive'],
+        index=1,
+        format_func=lambda x: t['pose_models'][x],
+        help=t['pose_model_help']
+    )
+    min_fps = time_budget_min = 0.0
+    if pose_model == 'adaptive':
+        min_fps = st.sidebar.number_input(t['min_fps_label'], min_value=0.0, max_value=120.0, value=15.0, step=1.0)
+        time_budget_min = st.sidebar.number_input(
+            t['time_budget_label'], min_value=0.0, max_value=600.0, value=0.0, step=1.0
+        )
+    side = st.sidebar.selectbox(
+        t['side_label'],
+        options=list(SIDE_MODES),
+        format_func=lambda x: t['side_modes'][x],
+        help=t['side_help']
+    )
+    video_profile = st.sidebar.selectbox(
+        t['video_profile_label'],
+        options=list(VIDEO_PROFILES),
+        format_func=lambda x: t['video_profiles'][x],
+        help=t['video_profile_help']
+    )
+    
+    # Title
+    st.title(t['title'])
+    st.markdown(f"**{t['subtitle']}**")
+    
+    # Input: an uploaded recording, or a live camera / stream
+    input_mode = st.radio(
+        t['input_mode_label'],
+        options=['upload', 'live'],
+        format_func=lambda x: t['input_modes'][x],
+        horizontal=True
+    )
+    if input_mode == 'live':
+        show_live_analysis(t, lang, inference_width, side)
+        return
+    
+    # Left live mode: stop a running analyzer so the camera is released
+    analyzer = st.session_state.get('live_analyzer')
+    if analyzer is not None and analyzer.running:
+        analyzer.stop()
+    
+    # File upload
+    uploaded_file = st.file_uploader(
+        t['upload_label'],
+        type=['mp4', 'avi', 'mov', 'mkv'],
+        help=t['upload_help']
+    )
+    
+    # Remove this session's previous upload once it is replaced or cleared
+    previous_upload = st.session_state.get('upload_path')
+    if uploaded_file is not None:
+        # Save uploaded file to disk (once; reruns reuse it)
+        video_path = save_upload(uploaded_file)
+        st.session_state.upload_path = video_path
+    else:
+        st.session_state.pop('upload_path', None)
+    if previous_upload != st.session_state.get('upload_path'):
+        # A new or cleared upload: the stored analysis belonged to the previous file
+        st.session_state.pop('analysis', None)
+        st.session_state.pop('video_processed', None)
+        if previous_upload:
+            Path(previous_upload).unlink(missing_ok=True)
+    
+    if uploaded_file is not None:
+        # Process button
+        if st.button('🚀 ' + ('Analyze Video' if lang == 'en' else 'Analisis Video'), type='primary'):
+            with st.spinner(t['processing']):
+                progress_bar = st.progress(0)
+                progress = ProgressReporter(streamlit_progress(progress_bar, t['progress_text']))
+                
+                try:
+                    # Analyze video (the annotated video is rendered later, on demand)
+                    analysis = analyze_video_cached(
+                        video_path, progress,
+                        frame_stride=frame_stride,
+                        inference_width=inference_width,
+                        workers=workers,
+                        motion_threshold=motion_threshold or None,
+                        motion_max_reuse_sec=motion_max_reuse_sec,
+                        model_complexity=1 if pose_model == 'adaptive' else pose_model,
+                        min_fps=min_fps or None,
+                        time_budget_sec=time_budget_min * 60 or None,
+                        side=side
+                    )
+                    
+                    if len(analysis.results) == 0:
+                        st.error(t['error_no_pose'])
+                    else:
+                        st.success(t['analysis_complete'])
+                        
                         # Store in session state to persist across form submissions
-                        st.session_state.output_video_path = output_video_path
-                        st.session_state.results_df = results_df
+                        st.session_state.analysis = analysis
                         st.session_state.video_processed = True
                         
                 except Exception as e:
@@ -895,24 +3377,26 @@ def main():
         
         # Display results if video has been processed (persists across form submissions)
         if 'video_processed' in st.session_state and st.session_state.video_processed:
-            output_video_path = st.session_state.output_video_path
-            results_df = st.session_state.results_df.copy()  # Make a copy to avoid modifying original
+            analysis = st.session_state.analysis
+            results_df = analysis.results_df  # A new frame over the stored columns, safe to add columns to
             
-            # Calculate statistics
-            avg_score = results_df['rula_score'].mean()
-            max_score = results_df['rula_score'].max()
-            min_score = results_df['rula_score'].min()
-            risk_level = get_risk_level(avg_score)
+            # Statistics aggregated once during the analysis
+            summary = analysis.stats.summary()
+            avg_score = summary['avg_score']
+            max_score = summary['max_score']
+            min_score = summary['min_score']
+            risk_level = summary['risk_level']
             
-            # Calculate average auto-detected adjustments for pre-filling
-            auto_upper_arm_raised = results_df['upper_arm_raised'].mean() > 0.5
-            auto_upper_arm_abducted = results_df['upper_arm_abducted'].mean() > 0.5
-            auto_lower_arm_midline = results_df['lower_arm_midline'].mean() > 0.5
-            auto_wrist_deviated = results_df['wrist_deviated'].mean() > 0.5
-            auto_neck_twisted = results_df['neck_twisted'].mean() > 0.5
-            auto_neck_bent = results_df['neck_bent'].mean() > 0.5
-            auto_trunk_twisted = results_df['trunk_twisted'].mean() > 0.5
-            auto_trunk_bent = results_df['trunk_bent'].mean() > 0.5
+            # Auto-detected adjustments set in most frames, for pre-filling
+            flag_frequency = summary['flag_frequency']
+            auto_upper_arm_raised = flag_frequency['upper_arm_raised'] > 0.5
+            auto_upper_arm_abducted = flag_frequency['upper_arm_abducted'] > 0.5
+            auto_lower_arm_midline = flag_frequency['lower_arm_midline'] > 0.5
+            auto_wrist_deviated = flag_frequency['wrist_deviated'] > 0.5
+            auto_neck_twisted = flag_frequency['neck_twisted'] > 0.5
+            auto_neck_bent = flag_frequency['neck_bent'] > 0.5
+            auto_trunk_twisted = flag_frequency['trunk_twisted'] > 0.5
+            auto_trunk_bent = flag_frequency['trunk_bent'] > 0.5
             
             # Display annotated video immediately (only once, doesn't reload)
             st.markdown(f"### {t['annotated_video']}")
@@ -922,19 +3406,24 @@ def main():
             
             # LEFT COLUMN: Video (smaller)
             with video_col:
-                try:
-                    st.video(output_video_path)
-                except Exception as e:
-                    st.warning("⚠️ " + ("Video preview not available. Download below." if lang == 'en' else "Pratinjau tidak tersedia. Unduh di bawah."))
-                    with open(output_video_path, 'rb') as f:
-                        video_bytes = f.read()
-                        st.download_button(
-                            label=f"📥 " + ("Download Video" if lang == 'en' else "Unduh Video"),
-                            data=video_bytes,
-                            file_name=f"selarassehat_{datetime.now().strftime('%Y%m%d_%H%M%S')}.mp4",
-                            mime='video/mp4',
-                            type='primary'
-                        )
+                if st.toggle(t['show_video'], key='show_video'):
+                    try:
+                        if not analysis.is_rendered(video_profile):
+                            with st.spinner(t['rendering_video']):
+                                analysis.render_video(video_profile)
+                        st.video(analysis.output_video_path)
+                    except Exception as e:
+                        st.warning("⚠️ " + ("Video preview not available. Download below." if lang == 'en' else "Pratinjau tidak tersedia. Unduh di bawah."))
+                        if analysis.video_rendered:
+                            with open(analysis.output_video_path, 'rb') as f:
+                                video_bytes = f.read()
+                                st.download_button(
+                                    label=f"📥 " + ("Download Video" if lang == 'en' else "Unduh Video"),
+                                    data=video_bytes,
+                                    file_name=f"selarassehat_{datetime.now().strftime('%Y%m%d_%H%M%S')}{Path(analysis.output_video_path).suffix}",
+                                    mime=analysis.output_mime,
+                                    type='primary'
+                                )
             
             # RIGHT COLUMN: Manual Adjustments
             with adjustment_col:
@@ -1011,6 +3500,7 @@ def main():
             
             # Recommendation
             st.info(f"**{t['recommendation']}:** {t['risk_levels'][risk_level]}")
+            show_risk_exposure(t, summary)
             
             # Show adjusted scores only after submit
             if submit_button:
@@ -1034,17 +3524,15 @@ def main():
                 
                 st.info(" | ".join(adj_summary))
                 
-                # Recalculate RULA with adjustments
-                adjusted_scores = []
-                for _, row in results_df.iterrows():
-                    new_score, score_a, score_b = RULACalculator.recalculate_rula(
-                        row['upper_arm_angle'], row['lower_arm_angle'], row['wrist_angle'],
-                        row['neck_angle'], row['trunk_angle'],
-                        upper_arm_raised, upper_arm_abducted, lower_arm_midline, wrist_deviated,
-                        neck_twisted, neck_bent, trunk_twisted, trunk_bent,
-                        wrist_twist, legs_score, muscle_use, force_load
-                    )
-                    adjusted_scores.append(new_score)
+                # Recalculate RULA with adjustments (column-wise over all frames)
+                adjusted_scores, _, _ = RULACalculator.recalculate_rula_batch(
+                    results_df['upper_arm_angle'].to_numpy(), results_df['lower_arm_angle'].to_numpy(),
+                    results_df['wrist_angle'].to_numpy(), results_df['neck_angle'].to_numpy(),
+                    results_df['trunk_angle'].to_numpy(),
+                    upper_arm_raised, upper_arm_abducted, lower_arm_midline, wrist_deviated,
+                    neck_twisted, neck_bent, trunk_twisted, trunk_bent,
+                    wrist_twist, legs_score, muscle_use, force_load
+                )
                 
                 results_df['adjusted_rula_score'] = adjusted_scores
                 
@@ -1074,6 +3562,18 @@ def main():
                 # Show original timeline only
                 st.plotly_chart(create_score_timeline(results_df, lang), use_container_width=True)
             
+            # Stage timings of the analysis (and of rendering, once done)
+            with st.expander(f"⏱️ {t['timings_title']}"):
+                for step, stage in analysis.timings.items():
+                    st.markdown(f"**{t['timings_steps'][step]}**")
+                    st.dataframe(pd.DataFrame(stage).T, use_container_width=True)
+                st.download_button(
+                    label=t['download_timings'],
+                    data=analysis.timings_json(),
+                    file_name=f"selarassehat_timings_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+                    mime='application/json'
+                )
+            
             st.markdown("---")
             
             # Download buttons
@@ -1089,19 +3589,21 @@ def main():
                 )
             
             with col2:
-                with open(output_video_path, 'rb') as f:
-                    st.download_button(
-                        label=f"🎥 {t['download_video']}",
-                        data=f,
-                        file_name=f"selarassehat_annotated_{datetime.now().strftime('%Y%m%d_%H%M%S')}.mp4",
-                        mime='video/mp4'
-                    )
-        
-        # Cleanup uploaded file
-        try:
-            os.unlink(video_path)
-        except:
-            pass
+                if not analysis.is_rendered(video_profile) and st.button(f"🎬 {t['prepare_video']}"):
+                    try:
+                        with st.spinner(t['rendering_video']):
+                            analysis.render_video(video_profile)
+                    except Exception as e:
+                        st.error(f"{t['error_processing']}: {str(e)}")
+                
+                if analysis.is_rendered(video_profile):
+                    with open(analysis.output_video_path, 'rb') as f:
+                        st.download_button(
+                            label=f"🎥 {t['download_video']}",
+                            data=f,
+                            file_name=f"selarassehat_annotated_{datetime.now().strftime('%Y%m%d_%H%M%S')}{Path(analysis.output_video_path).suffix}",
+                            mime=analysis.output_mime
+                        )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,233 @@
+"""Headless batch scoring of recorded videos with the SelarasSehat RULA pipeline
+
+Usage:
+    python selarassehat_batch.py VIDEO_DIR_OR_GLOB [...] --output-dir results --workers 4
+
+Writes one per-frame results file per video plus a summary table with the
+average, maximum and minimum RULA score and risk level of every video.
+
+Long analyses checkpoint their progress next to the landmark cache; rerunning an
+interrupted batch resumes each video from its last checkpoint, and --partial
+writes the results checkpointed so far while a batch is still running.
+"""
+import argparse
+import glob
+import importlib.util
+import multiprocessing
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import pandas as pd
+
+from selarassehat_app import (
+    CHECKPOINT_INTERVAL_SEC, DEFAULT_VIDEO_PROFILE, MOTION_MAX_REUSE_SEC, SIDE_MODES, TRANSLATIONS, VIDEO_PROFILES,
+    get_risk_level, load_partial_analysis, log_progress, process_video,
+)
+
+VIDEO_EXTENSIONS = {'.mp4', '.avi', '.mov', '.mkv'}
+
+
+def find_videos(inputs):
+    """Expand directories and glob patterns into a sorted list of video files"""
+    videos = set()
+    for pattern in inputs:
+        path = Path(pattern)
+        if path.is_dir():
+            candidates = path.iterdir()
+        else:
+            candidates = (Path(match) for match in glob.glob(pattern, recursive=True))
+        videos.update(
+            candidate.resolve() for candidate in candidates
+            if candidate.is_file() and candidate.suffix.lower() in VIDEO_EXTENSIONS
+        )
+    return sorted(videos)
+
+
+def _output_stems(videos):
+    """Unique output file stems, so videos with the same name in different folders don't collide"""
+    stems = []
+    used = set()
+    for video in videos:
+        stem = video.stem
+        n = 2
+        while stem in used:
+            stem = f"{video.stem}_{n}"
+            n += 1
+        used.add(stem)
+        stems.append(stem)
+    return stems
+
+
+def write_table(df, path, output_format):
+    """Write a table as CSV or Parquet"""
+    if output_format == 'parquet':
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+
+
+def score_video(video_path, output_dir, stem, output_format='csv', render=False, progress=False, partial=False,
+                **options):
+    """Score one video and write its per-frame results; returns its summary row
+    
+    With `partial`, nothing is analysed: the results checkpointed so far by a
+    running or interrupted analysis with the same options are written instead.
+    """
+    started = time.perf_counter()
+    summary = {'video': str(video_path)}
+    
+    try:
+        if partial:
+            analysis = load_partial_analysis(str(video_path), **options)
+            if analysis is None:
+                raise Exception('No checkpoint found')
+            output_video_path = analysis.render_video(profile=options['video_profile']) if render else None
+            results_df = analysis.results_df
+        else:
+            output_video_path, results_df = process_video(
+                str(video_path), log_progress(f"{stem}: ") if progress else None, render=render, **options
+            )
+        
+        results_file = output_dir / f"{stem}_rula.{output_format}"
+        write_table(results_df, results_file, output_format)
+        summary['results_file'] = str(results_file)
+        
+        if output_video_path:
+            annotated_file = output_dir / f"{stem}_annotated{Path(output_video_path).suffix}"
+            shutil.move(output_video_path, annotated_file)
+            summary['annotated_video'] = str(annotated_file)
+        
+        summary['frames_with_pose'] = len(results_df)
+        if len(results_df) > 0:
+            avg_score = results_df['rula_score'].mean()
+            risk_level = get_risk_level(avg_score)
+            summary.update({
+                'avg_score': round(float(avg_score), 2),
+                'max_score': int(results_df['rula_score'].max()),
+                'min_score': int(results_df['rula_score'].min()),
+                'risk_level': risk_level,
+                'recommendation': TRANSLATIONS['en']['risk_levels'][risk_level],
+            })
+        else:
+            summary['error'] = 'No pose detected'
+    except Exception as e:
+        summary['error'] = f"{type(e).__name__}: {e}"
+    
+    summary['processing_sec'] = round(time.perf_counter() - started, 1)
+    return summary
+
+
+SUMMARY_COLUMNS = [
+    'video', 'frames_with_pose', 'avg_score', 'max_score', 'min_score', 'risk_level',
+    'recommendation', 'results_file', 'annotated_video', 'processing_sec', 'error',
+]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Score a directory or glob of videos with RULA, in parallel.')
+    parser.add_argument('inputs', nargs='+', help='video files, directories or glob patterns')
+    parser.add_argument('-o', '--output-dir', default='selarassehat_results', help='where to write results')
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count() or 1,
+                        help='number of videos scored in parallel (default: CPU count)')
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv', help='per-video results format')
+    parser.add_argument('--render', action='store_true', help='also write annotated videos (slower)')
+    parser.add_argument('--video-profile', choices=list(VIDEO_PROFILES), default=DEFAULT_VIDEO_PROFILE,
+                        help='annotated video output profile (with --render)')
+    parser.add_argument('--frame-stride', type=int, default=1, help='run pose detection on every N-th frame')
+    parser.add_argument('--analysis-fps', type=float, default=None, help='target pose detection rate in Hz')
+    parser.add_argument('--inference-width', type=int, default=None, help='downscale frames to this width for pose detection')
+    parser.add_argument('--motion-threshold', type=float, default=None,
+                        help='reuse the last pose on frames where at most this percentage of pixels changed since '
+                             'the last analyzed one (e.g. 0.2; default: analyze every frame)')
+    parser.add_argument('--motion-max-reuse', type=float, default=MOTION_MAX_REUSE_SEC,
+                        help=f'run pose detection at least every this many seconds (default: {MOTION_MAX_REUSE_SEC})')
+    parser.add_argument('--model-complexity', type=int, choices=[0, 1, 2], default=1,
+                        help='MediaPipe Pose model complexity (the starting model with --time-budget/--min-fps)')
+    parser.add_argument('--time-budget', type=float, default=None,
+                        help='adapt the model complexity to finish each video within this many seconds')
+    parser.add_argument('--min-fps', type=float, default=None,
+                        help='adapt the model complexity to analyze at least this many video frames per second')
+    parser.add_argument('--side', choices=SIDE_MODES, default='right',
+                        help='body side scored: a fixed side, the worse-scoring one or the more visible arm, per frame')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='do not read or write the landmark cache (nor checkpoint progress)')
+    parser.add_argument('--checkpoint-sec', type=float, default=CHECKPOINT_INTERVAL_SEC,
+                        help='checkpoint progress every this many seconds, 0 to disable '
+                             f'(default: {CHECKPOINT_INTERVAL_SEC:g})')
+    parser.add_argument('--partial', action='store_true',
+                        help='write the results checkpointed so far by a running or interrupted batch with the same '
+                             'options, without analysing')
+    parser.add_argument('--progress', action='store_true', help='print per-video progress, fps and ETA (a few lines a second)')
+    args = parser.parse_args(argv)
+    
+    if args.format == 'parquet' and not (importlib.util.find_spec('pyarrow') or importlib.util.find_spec('fastparquet')):
+        parser.error('--format parquet requires pyarrow or fastparquet to be installed')
+    if args.workers < 1:
+        parser.error('--workers must be at least 1')
+    
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    
+    videos = find_videos(args.inputs)
+    if not videos:
+        print('No videos found', file=sys.stderr)
+        return 1
+    
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    
+    options = {
+        'output_format': args.format,
+        'render': args.render,
+        'video_profile': args.video_profile,
+        'frame_stride': args.frame_stride,
+        'analysis_fps': args.analysis_fps,
+        'inference_width': args.inference_width,
+        'motion_threshold': args.motion_threshold,
+        'motion_max_reuse_sec': args.motion_max_reuse,
+        'model_complexity': args.model_complexity,
+        'time_budget_sec': args.time_budget,
+        'min_fps': args.min_fps,
+        'side': args.side,
+        'use_cache': not args.no_cache,
+        'checkpoint_sec': args.checkpoint_sec,
+        'progress': args.progress,
+        'partial': args.partial,
+    }
+    
+    summaries = []
+    workers = min(args.workers, len(videos))
+    print(f"Scoring {len(videos)} video(s) with {workers} worker(s)", file=sys.stderr)
+    
+    # Spawn fresh interpreters: MediaPipe is not safe to use across fork
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+        futures = [
+            executor.submit(score_video, video, output_dir, stem, **options)
+            for video, stem in zip(videos, _output_stems(videos))
+        ]
+        for done, future in enumerate(as_completed(futures), start=1):
+            summary = future.result()
+            summaries.append(summary)
+            status = summary.get('error') or f"avg {summary['avg_score']:.2f}, risk level {summary['risk_level']}"
+            print(f"[{done}/{len(futures)}] {summary['video']}: {status}", file=sys.stderr)
+    
+    summary_df = pd.DataFrame(summaries).reindex(columns=SUMMARY_COLUMNS).sort_values('video')
+    summary_df = summary_df.astype({
+        'frames_with_pose': 'Int64', 'max_score': 'Int64', 'min_score': 'Int64', 'risk_level': 'Int64',
+    })
+    summary_file = output_dir / f"summary.{args.format}"
+    write_table(summary_df, summary_file, args.format)
+    print(f"Summary written to {summary_file}", file=sys.stderr)
+    
+    return 1 if summary_df['error'].notna().any() else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
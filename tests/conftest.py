@@ -0,0 +1,28 @@
+"""Shared fixtures: synthetic inputs from the benchmarks and an isolated landmark cache"""
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_DIR))
+sys.path.insert(0, str(REPO_DIR / 'benchmarks'))
+
+import selarassehat_app  # noqa: E402
+from synthetic import make_video  # noqa: E402
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    """Point the landmark cache and checkpoints at a temp dir, here and in spawned workers"""
+    path = tmp_path / 'cache'
+    monkeypatch.setenv('SELARASSEHAT_CACHE_DIR', str(path))
+    monkeypatch.setattr(selarassehat_app, 'LANDMARK_CACHE_DIR', path)
+    monkeypatch.setattr(selarassehat_app, 'CHECKPOINT_DIR', path / 'checkpoints')
+    return path
+
+
+@pytest.fixture(scope='session')
+def synthetic_video(tmp_path_factory):
+    """A short, small synthetic clip of the cartoon worker (30 frames at 30 fps)"""
+    return str(make_video(tmp_path_factory.mktemp('videos') / 'worker.avi', 320, 240, 30))
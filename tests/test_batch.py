@@ -0,0 +1,47 @@
+"""Command-line batch scoring and its summary table"""
+import shutil
+
+import pandas as pd
+
+import selarassehat_batch
+from selarassehat_batch import SUMMARY_COLUMNS, _output_stems, find_videos
+
+
+def test_find_videos_and_output_stems(tmp_path):
+    for name in ['a/clip.mp4', 'b/clip.MOV', 'b/notes.txt']:
+        (tmp_path / name).parent.mkdir(exist_ok=True)
+        (tmp_path / name).touch()
+    videos = find_videos([str(tmp_path / 'a'), str(tmp_path / 'b' / '*')])
+    assert [video.name for video in videos] == ['clip.mp4', 'clip.MOV']
+    assert _output_stems(videos) == ['clip', 'clip_2']
+
+
+def test_no_videos(tmp_path, capsys):
+    assert selarassehat_batch.main([str(tmp_path)]) == 1
+    assert 'No videos found' in capsys.readouterr().err
+
+
+def test_summary(tmp_path, cache_dir, synthetic_video):
+    inputs = tmp_path / 'inputs'
+    inputs.mkdir()
+    shutil.copy(synthetic_video, inputs / 'worker.avi')
+    (inputs / 'broken.mp4').write_bytes(b'not a video')
+    output_dir = tmp_path / 'results'
+    
+    assert selarassehat_batch.main([str(inputs), '-o', str(output_dir), '-w', '2']) == 1
+    
+    summary = pd.read_csv(output_dir / 'summary.csv')
+    assert summary.columns.tolist() == SUMMARY_COLUMNS
+    assert summary['video'].tolist() == [str(inputs / 'broken.mp4'), str(inputs / 'worker.avi')]
+    broken, worker = summary.to_dict('records')
+    
+    assert isinstance(broken['error'], str)
+    assert pd.isna(broken['avg_score'])
+    
+    assert pd.isna(worker['error'])
+    results = pd.read_csv(worker['results_file'])
+    assert worker['frames_with_pose'] == len(results) > 0
+    assert worker['avg_score'] == round(results['rula_score'].mean(), 2)
+    assert worker['max_score'] == results['rula_score'].max()
+    assert worker['min_score'] == results['rula_score'].min()
+    assert worker['risk_level'] in (1, 2, 3, 4)
@@ -0,0 +1,146 @@
+"""Frame filling, segment splitting, checkpoints and partial results of the video pipeline"""
+import numpy as np
+import pytest
+
+import selarassehat_app
+from selarassehat_app import (
+    LANDMARK_DTYPES, LANDMARK_SHAPES, AnalysisCheckpoint, ColumnStore, RULACalculator, _landmark_options,
+    _segment_bounds, analyze_video, checkpoint_key, fill_skipped_frames, landmark_cache_key, load_partial_analysis,
+    open_video,
+)
+from synthetic import make_landmarks
+
+
+def constant_landmarks(values):
+    """(N, 33, 4) landmarks where every coordinate of frame i equals values[i]"""
+    return np.repeat(np.asarray(values, dtype=np.float32)[:, None, None], 33, axis=1).repeat(4, axis=2)
+
+
+def landmark_samples(frames, seed=0):
+    """ColumnStore of synthetic landmark samples for these frame numbers"""
+    samples = ColumnStore(LANDMARK_DTYPES, shapes=LANDMARK_SHAPES)
+    for frame, landmarks in zip(frames, make_landmarks(len(frames), seed)):
+        samples.append(frame=frame, landmarks=landmarks, reused=False, model_complexity=1)
+    return samples
+
+
+def test_fill_skipped_frames_without_stride():
+    landmarks = constant_landmarks([0, 1, 2])
+    frames, filled, measured = fill_skipped_frames([1, 2, 3], landmarks, 3, 1)
+    assert frames.tolist() == [1, 2, 3]
+    np.testing.assert_array_equal(filled, landmarks)
+    assert measured.all()
+
+
+def test_fill_skipped_frames_interpolates_and_holds():
+    frames, filled, measured = fill_skipped_frames([1, 3, 5], constant_landmarks([0, 2, 4]), 6, 2)
+    assert frames.tolist() == [1, 2, 3, 4, 5, 6]
+    np.testing.assert_allclose(filled[:, 0, 0], [0, 1, 2, 3, 4, 4])
+    assert measured.tolist() == [True, False, True, False, True, False]
+
+
+def test_fill_skipped_frames_drops_frames_next_to_missing_pose():
+    frames, filled, measured = fill_skipped_frames([1, 3, 5], constant_landmarks([0, np.nan, 4]), 5, 2)
+    assert frames.tolist() == [1, 5]
+    np.testing.assert_allclose(filled[:, 0, 0], [0, 4])
+    assert measured.all()
+
+
+def test_fill_skipped_frames_empty():
+    frames, filled, measured = fill_skipped_frames([], np.empty((0, 33, 4), dtype=np.float32), 10, 2)
+    assert len(frames) == len(filled) == len(measured) == 0
+    assert filled.shape == (0, 33, 4)
+
+
+def test_segment_bounds():
+    assert _segment_bounds(300, 3) == [(1, 100), (101, 200), (201, None)]
+    assert _segment_bounds(10, 1) == [(1, None)]
+
+
+@pytest.mark.parametrize('total_frames, workers', [(7, 3), (2, 4), (1, 8), (1000, 6)])
+def test_segment_bounds_cover_every_frame_once(total_frames, workers):
+    segments = _segment_bounds(total_frames, workers)
+    assert len(segments) == min(workers, total_frames)
+    assert segments[0][0] == 1
+    assert segments[-1][1] is None
+    for (_, last), (first, _) in zip(segments, segments[1:]):
+        assert first == last + 1
+
+
+def test_checkpoint_round_trip(cache_dir):
+    samples = landmark_samples(range(1, 11))
+    checkpoint = AnalysisCheckpoint('video_1-end', interval_sec=0)
+    checkpoint.save(samples, 10)
+    
+    more = landmark_samples(range(11, 21), seed=1)
+    samples.extend(**more.columns())
+    checkpoint.save(samples, 20, finished=True)
+    assert len(list(checkpoint.path.glob('*.npz'))) == 2
+    
+    restored = ColumnStore(LANDMARK_DTYPES, shapes=LANDMARK_SHAPES)
+    assert AnalysisCheckpoint('video_1-end').restore(restored) == (20, True)
+    for name, values in samples.columns().items():
+        np.testing.assert_array_equal(restored.columns()[name], values)
+
+
+def test_checkpoint_restore_unfinished_and_missing(cache_dir):
+    samples = landmark_samples(range(1, 6))
+    AnalysisCheckpoint('video_1-end').save(samples, 5)
+    
+    restored = ColumnStore(LANDMARK_DTYPES, shapes=LANDMARK_SHAPES)
+    assert AnalysisCheckpoint('video_1-end').restore(restored) == (5, False)
+    assert len(restored) == 5
+    
+    empty = ColumnStore(LANDMARK_DTYPES, shapes=LANDMARK_SHAPES)
+    assert AnalysisCheckpoint('other_1-end').restore(empty) == (0, False)
+    assert len(empty) == 0
+
+
+def cache_key_of(video_path):
+    """Landmark cache key of an analysis of `video_path` with the default options"""
+    cap, fps, _, _, _ = open_video(video_path)
+    cap.release()
+    frame_stride, pose_options, gate_options, adaptive_options = _landmark_options(fps)
+    return landmark_cache_key(video_path, frame_stride, None, pose_options, gate_options, adaptive_options)
+
+
+def test_load_partial_analysis_without_checkpoint(cache_dir, synthetic_video):
+    assert load_partial_analysis(synthetic_video) is None
+
+
+def test_load_partial_analysis_from_checkpoint(cache_dir, synthetic_video):
+    samples = landmark_samples(range(1, 11))
+    AnalysisCheckpoint(checkpoint_key(cache_key_of(synthetic_video))).save(samples, 10)
+    
+    analysis = load_partial_analysis(synthetic_video)
+    assert analysis.frame_count == 10
+    results_df = analysis.results_df
+    assert results_df['frame'].tolist() == list(range(1, 11))
+    expected = RULACalculator.calculate_rula_batch(samples.columns()['landmarks'])['rula_score']
+    np.testing.assert_array_equal(results_df['rula_score'], expected)
+
+
+def test_load_partial_analysis_stops_at_unfinished_segment(cache_dir, synthetic_video):
+    cache_key = cache_key_of(synthetic_video)
+    (first, last), (second, _) = _segment_bounds(30, 2)
+    AnalysisCheckpoint(checkpoint_key(cache_key, first, last)).save(landmark_samples(range(first, 6)), 5)
+    AnalysisCheckpoint(checkpoint_key(cache_key, second)).save(landmark_samples(range(second, 21)), 20)
+    
+    analysis = load_partial_analysis(synthetic_video, workers=2)
+    assert analysis.results_df['frame'].tolist() == list(range(1, 6))
+    
+    AnalysisCheckpoint(checkpoint_key(cache_key, first, last)).save(
+        landmark_samples(range(first, last + 1)), last, finished=True
+    )
+    analysis = load_partial_analysis(synthetic_video, workers=2)
+    assert analysis.results_df['frame'].tolist() == list(range(1, 21))
+
+
+def test_load_partial_analysis_after_finished_run(cache_dir, synthetic_video):
+    analysis = analyze_video(synthetic_video, checkpoint_sec=0.01)
+    assert len(analysis.results_df) > 0
+    assert not list(selarassehat_app.CHECKPOINT_DIR.glob('*'))
+    
+    partial = load_partial_analysis(synthetic_video)
+    assert partial.frame_count == analysis.frame_count
+    np.testing.assert_array_equal(partial.results_df['rula_score'], analysis.results_df['rula_score'])
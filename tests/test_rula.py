@@ -0,0 +1,36 @@
+"""The vectorized RULA scoring matches the per-frame API frame by frame"""
+import numpy as np
+import pytest
+
+from selarassehat_app import RESULT_COLUMNS, SIDE_MODES, SIDES, RULACalculator
+from synthetic import make_landmarks, to_landmark_lists
+
+ANGLE_COLUMNS = ['upper_arm_angle', 'lower_arm_angle', 'wrist_angle', 'neck_angle', 'trunk_angle']
+
+
+@pytest.mark.parametrize('side', SIDE_MODES)
+def test_batch_matches_scalar(side):
+    landmarks = make_landmarks(200, seed=1)
+    batch = RULACalculator.calculate_rula_batch(landmarks, side=side)
+    
+    for i, frame in enumerate(to_landmark_lists(landmarks)):
+        scalar = RULACalculator.calculate_rula_from_landmarks(frame, side=side)
+        assert SIDES[batch['side'][i]] == scalar['side']
+        for name, value in scalar.items():
+            if name == 'side':
+                continue
+            if name in ANGLE_COLUMNS:
+                assert batch[name][i] == pytest.approx(value, abs=1e-6), (i, name)
+            else:
+                assert batch[name][i] == value, (i, name)
+
+
+def test_batch_covers_result_columns():
+    batch = RULACalculator.calculate_rula_batch(make_landmarks(5))
+    assert not set(RESULT_COLUMNS) - set(batch)
+    assert all(len(values) == 5 for values in batch.values())
+
+
+def test_batch_rejects_unknown_side():
+    with pytest.raises(Exception, match='Unknown side'):
+        RULACalculator.calculate_rula_batch(make_landmarks(1), side='middle')